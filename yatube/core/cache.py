@@ -0,0 +1,169 @@
+import hashlib
+import re
+import time
+from functools import wraps
+from urllib.parse import parse_qsl
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+from .metrics import registry
+
+TAG_KEY = 'page_cache:tag:{}'
+PAGE_KEY = 'page_cache:page:{}'
+FRAGMENT_KEY = 'page_cache:fragment:{}'
+COUNTER_KEY = 'page_cache:{}:{}'
+CACHE_HEADER = 'X-Page-Cache'
+HOLE_PATTERN = re.compile(r'<!--hole:([^>]*)-->')
+
+cached_views = set()
+
+
+def _new_version() -> str:
+    return str(time.time_ns())
+
+
+def _tag_key(tag: str) -> str:
+    return TAG_KEY.format(hashlib.md5(tag.encode()).hexdigest())
+
+
+def get_tag_versions(tags) -> list:
+    """Вернуть текущие версии тегов, заведя недостающие."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags) -> None:
+    """Сбросить все страницы, помеченные хотя бы одним из тегов."""
+    version = _new_version()
+    cache.set_many({_tag_key(tag): version for tag in tags}, None)
+
+
+def _count(view_name: str, result: str) -> None:
+    registry.inc(
+        'yatube_page_cache_requests_total',
+        {'view': view_name, 'result': result},
+    )
+    key = COUNTER_KEY.format(result, view_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def page_cache_stats() -> dict:
+    """Вернуть счётчики попаданий и промахов кэша по представлениям."""
+    keys = [
+        COUNTER_KEY.format(result, view_name)
+        for view_name in sorted(cached_views)
+        for result in ('hits', 'misses')
+    ]
+    counters = cache.get_many(keys)
+    return {
+        view_name: {
+            result: counters.get(COUNTER_KEY.format(result, view_name), 0)
+            for result in ('hits', 'misses')
+        }
+        for view_name in sorted(cached_views)
+    }
+
+
+def get_page_key(view_name: str, request, tags) -> str:
+    """Собрать ключ страницы из адреса, номера страницы и версий тегов."""
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    parts = [view_name, request.path, query, *get_tag_versions(tags)]
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return PAGE_KEY.format(digest)
+
+
+def cached_fragment(request, fragment: str, tags, timeout: int, render,
+                    vary=()) -> str:
+    """
+    Вернуть HTML фрагмента страницы из кэша или отрендерить его render().
+
+    Ключ собирается из имени, значений vary и версий тегов фрагмента,
+    поэтому фрагмент сбрасывается своими тегами независимо от остальной
+    страницы. Кэшируется только рендер скелета, где вместо {% hole %}
+    стоят метки, а не чьи-то персональные данные.
+    """
+    if not getattr(request, 'page_skeleton', False):
+        return render()
+    parts = [fragment, *map(str, vary), *get_tag_versions(tags)]
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    key = FRAGMENT_KEY.format(digest)
+    content = cache.get(key)
+    result = 'hits'
+    if content is None:
+        result = 'misses'
+        content = render()
+        cache.set(key, content, timeout)
+    registry.inc(
+        'yatube_fragment_cache_requests_total',
+        {'fragment': fragment, 'result': result},
+    )
+    return mark_safe(content)
+
+
+def fill_holes(request, content: str, context: dict) -> str:
+    """Отрендерить персональные фрагменты на месте меток скелета."""
+    def render_hole(match):
+        values = dict(parse_qsl(match.group(1)))
+        template_name = values.pop('template')
+        return render_to_string(template_name, {**context, **values}, request)
+    return HOLE_PATTERN.sub(render_hole, content)
+
+
+def cache_page_skeleton(timeout: int, tags=None, fragments=None):
+    """
+    Кэшировать общий для всех пользователей скелет страницы.
+
+    Фрагменты, подключённые тегом {% hole %}, рендерятся заново для
+    каждого запроса с контекстом fragments(request, *args, **kwargs).
+    tags(request, *args, **kwargs) возвращает теги страницы: при сбросе
+    любого из них через invalidate_tags скелет рендерится заново.
+    """
+    def decorator(view_func):
+        view_name = view_func.__name__
+        cached_views.add(view_name)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            page_tags = tags(request, *args, **kwargs) if tags else ()
+            key = get_page_key(view_name, request, page_tags)
+            cached = cache.get(key)
+            if cached is not None:
+                _count(view_name, 'hits')
+                skeleton, content_type = cached
+                response = HttpResponse(content_type=content_type)
+                response[CACHE_HEADER] = 'hit'
+            else:
+                _count(view_name, 'misses')
+                request.page_skeleton = True
+                try:
+                    response = view_func(request, *args, **kwargs)
+                finally:
+                    request.page_skeleton = False
+                if response.streaming:
+                    return response
+                skeleton = response.content.decode(response.charset)
+                if response.status_code == 200 and not response.cookies:
+                    cache.set(
+                        key, (skeleton, response['Content-Type']), timeout
+                    )
+                response[CACHE_HEADER] = 'miss'
+            context = fragments(request, *args, **kwargs) if fragments else {}
+            response.content = fill_holes(request, skeleton, context)
+            return response
+        return wrapper
+    return decorator
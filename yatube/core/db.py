@@ -0,0 +1,28 @@
+from django.conf import settings
+
+# busy_timeout здесь не задаётся: ожидание блокировки настраивается в
+# одном месте, таймаутом соединения sqlite3 (OPTIONS['timeout'] в
+# DATABASES и --timeout у sqlite_stress).
+PRAGMA_PROFILES = {
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def apply_pragmas(cursor, pragmas: dict) -> None:
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применить к новому соединению SQLite профиль SQLITE_PRAGMA_PROFILE."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, PRAGMA_PROFILES[settings.SQLITE_PRAGMA_PROFILE])
@@ -0,0 +1,137 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в отдельном процессе, чтобы каждый запуск был холодным.
+PROBE = r'''
+import io
+import json
+import sys
+import time
+
+start = time.perf_counter()
+from yatube.wsgi import application
+imported = time.perf_counter()
+
+
+def request(path):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': '10.0.0.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    started = time.perf_counter()
+    response = application(
+        environ, lambda status, headers, exc_info=None: statuses.append(status)
+    )
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return time.perf_counter() - started, statuses[0]
+
+
+first, status = request(sys.argv[1])
+second, _ = request(sys.argv[1])
+print(json.dumps({
+    'import': imported - start,
+    'first': first,
+    'second': second,
+    'status': status,
+}))
+'''
+IMPORTTIME_PREFIX = 'import time:'
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет холодный старт yatube.wsgi и время первого и второго '
+        'запроса в отдельных процессах для профилей настроек.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--env', action='append', choices=['development', 'production'],
+            help='Профиль YATUBE_ENV; по умолчанию оба.',
+        )
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument(
+            '--imports', type=int, default=0, metavar='N',
+            help='Показать N самых долгих импортов по -X importtime.',
+        )
+
+    def handle(self, *args, **options):
+        for environment in options['env'] or ['development', 'production']:
+            runs = [
+                self.probe(environment, options['path'], options['imports'])
+                for _ in range(options['runs'])
+            ]
+            self.stdout.write(
+                f'{environment} ({runs[0]["status"]}): '
+                + ', '.join(
+                    f'{name} {self.median(runs, name)} мс'
+                    for name in ('import', 'first', 'second')
+                )
+            )
+            if options['imports']:
+                for cumulative, module in runs[-1]['imports']:
+                    self.stdout.write(
+                        f'  {cumulative / 1000:8.1f} мс {module}'
+                    )
+
+    @staticmethod
+    def median(runs, name) -> str:
+        return f'{statistics.median(run[name] for run in runs) * 1000:.0f}'
+
+    def probe(self, environment, path, imports) -> dict:
+        env = {
+            **os.environ,
+            'YATUBE_ENV': environment,
+            'YATUBE_WARMUP': '0',
+            'DJANGO_SETTINGS_MODULE': 'yatube.settings',
+        }
+        env.setdefault('YATUBE_SECRET_KEY', 'bench-startup')
+        command = [sys.executable]
+        if imports:
+            command += ['-X', 'importtime']
+        result = subprocess.run(
+            command + ['-c', PROBE, path],
+            cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        if imports:
+            run['imports'] = self.slowest_imports(result.stderr, imports)
+        return run
+
+    @staticmethod
+    def slowest_imports(stderr, count) -> list:
+        """Разобрать вывод -X importtime: (суммарные мкс, модуль)."""
+        timings = []
+        for line in stderr.splitlines():
+            if not line.startswith(IMPORTTIME_PREFIX):
+                continue
+            _, cumulative, module = line[len(IMPORTTIME_PREFIX):].split('|')
+            if cumulative.strip().isdigit():
+                timings.append((int(cumulative), module.rstrip()))
+        return sorted(timings, reverse=True)[:count]
@@ -0,0 +1,159 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.db import PRAGMA_PROFILES, apply_pragmas
+
+SCHEMA = '''
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    author_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    pub_date REAL NOT NULL
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+CREATE INDEX post_author ON post (author_id);
+'''
+READ_QUERY = (
+    'SELECT id, author_id, text FROM post '
+    'WHERE author_id = ? ORDER BY pub_date DESC LIMIT 10'
+)
+WRITE_QUERY = 'INSERT INTO post (author_id, text, pub_date) VALUES (?, ?, ?)'
+AUTHORS = 100
+
+
+def prepare_database(path: str, profile: str, rows: int) -> None:
+    connection = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(connection, PRAGMA_PROFILES[profile])
+    connection.executescript(SCHEMA)
+    connection.execute('BEGIN')
+    connection.executemany(WRITE_QUERY, (
+        (number % AUTHORS, f'Пост {number}', time.time())
+        for number in range(rows)
+    ))
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def run_worker(path, profile, timeout, duration, write_ratio, seed):
+    """
+    Нагрузить базу чтениями и записями, как это делает Django:
+    автокоммит и явная транзакция вокруг каждой записи.
+    """
+    rnd = random.Random(seed)
+    connection = sqlite3.connect(
+        path, timeout=timeout, isolation_level=None,
+        check_same_thread=False,
+    )
+    apply_pragmas(connection, PRAGMA_PROFILES[profile])
+    stats = {'reads': 0, 'writes': 0, 'locked': 0, 'latencies': []}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        author = rnd.randrange(AUTHORS)
+        start = time.perf_counter()
+        try:
+            if rnd.random() < write_ratio:
+                connection.execute('BEGIN')
+                connection.execute(
+                    WRITE_QUERY, (author, 'Новый пост', time.time())
+                )
+                connection.execute('COMMIT')
+                stats['writes'] += 1
+            else:
+                connection.execute(READ_QUERY, (author,)).fetchall()
+                stats['reads'] += 1
+        except sqlite3.OperationalError as error:
+            if 'locked' not in str(error) and 'busy' not in str(error):
+                raise
+            stats['locked'] += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+        stats['latencies'].append(time.perf_counter() - start)
+    connection.close()
+    return stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает временную базу SQLite потоками и процессами '
+        'и сравнивает профили PRAGMA по пропускной способности '
+        'и числу ошибок блокировки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', nargs='+', default=list(PRAGMA_PROFILES),
+            choices=list(PRAGMA_PROFILES),
+            help='Профили PRAGMA из core.db.PRAGMA_PROFILES.',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Число потоков в одном процессе.',
+        )
+        parser.add_argument(
+            '--processes', type=int, default=4,
+            help='Число процессов.',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Длительность каждого прогона в секундах.',
+        )
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.2,
+            help='Доля операций записи.',
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=5.0,
+            help='Таймаут ожидания блокировки в секундах, как у sqlite3.',
+        )
+        parser.add_argument(
+            '--rows', type=int, default=10000,
+            help='Сколько постов создать перед прогоном.',
+        )
+
+    def handle(self, *args, **options):
+        modes = (
+            ('threads', 'потоки', ThreadPoolExecutor, options['threads']),
+            ('processes', 'процессы', ProcessPoolExecutor,
+             options['processes']),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in options['profiles']:
+                for name, mode, executor_class, workers in modes:
+                    path = os.path.join(
+                        directory, f'{profile}-{name}-{workers}.db'
+                    )
+                    prepare_database(path, profile, options['rows'])
+                    with executor_class(max_workers=workers) as executor:
+                        results = list(executor.map(
+                            run_worker,
+                            *zip(*[
+                                (path, profile, options['timeout'],
+                                 options['duration'], options['write_ratio'],
+                                 seed)
+                                for seed in range(workers)
+                            ]),
+                        ))
+                    self.report(profile, mode, workers, results, options)
+
+    def report(self, profile, mode, workers, results, options):
+        reads = sum(result['reads'] for result in results)
+        writes = sum(result['writes'] for result in results)
+        locked = sum(result['locked'] for result in results)
+        latencies = sorted(
+            latency for result in results for latency in result['latencies']
+        )
+        p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+        duration = options['duration']
+        self.stdout.write(
+            f'{profile:>8} {mode:>8} x{workers:<3}'
+            f' чтений/с: {reads / duration:9.0f}'
+            f' записей/с: {writes / duration:8.0f}'
+            f' блокировок: {locked:5}'
+            f' p99: {p99 * 1000:7.1f} мс'
+        )
@@ -0,0 +1,66 @@
+import os
+import re
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    Файл, читаемый только в пределах диапазона байт.
+
+    fileno() отдаётся наружу, чтобы wsgi.file_wrapper сервера мог
+    отправить диапазон через sendfile с текущей позиции файла.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def parse_range(header: str, size: int):
+    """
+    Разобрать заголовок Range с одним диапазоном.
+
+    Вернуть (start, end) включительно, None если заголовок не поддержан
+    и нужно отдать файл целиком, или False если диапазон недостижим.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        length = int(end)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def media_path(root: str, path: str) -> str:
+    """Вернуть путь к файлу внутри root или None."""
+    root = os.path.realpath(root)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full_path]) != root:
+        return None
+    return full_path
@@ -0,0 +1,340 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS = {
+    'yatube_http_requests_total': (
+        'counter', 'Запросы по представлению, методу и коду ответа.'
+    ),
+    'yatube_http_request_duration_seconds': (
+        'histogram', 'Время ответа представления.'
+    ),
+    'yatube_db_queries_total': (
+        'counter', 'Запросы к базе по представлению.'
+    ),
+    'yatube_db_query_duration_seconds_total': (
+        'counter', 'Суммарное время запросов к базе по представлению.'
+    ),
+    'yatube_page_cache_requests_total': (
+        'counter', 'Обращения к кэшу страниц.'
+    ),
+    'yatube_fragment_cache_requests_total': (
+        'counter', 'Обращения к кэшу фрагментов шаблонов.'
+    ),
+    'yatube_thumbnail_generation_seconds': (
+        'histogram', 'Время создания миниатюры.'
+    ),
+    'yatube_process_resident_memory_bytes': (
+        'gauge', 'Резидентная память рабочего процесса.'
+    ),
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Накопленные счётчики и гистограммы завершившихся процессов.
+ARCHIVE_NAME = 'archive.json'
+LOCK_NAME = '.lock'
+
+
+def format_labels(labels: dict) -> str:
+    def escape(value):
+        return (
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+    return ','.join(
+        f'{name}="{escape(value)}"' for name, value in sorted(labels.items())
+    )
+
+
+def resident_memory() -> int:
+    """Вернуть RSS процесса в байтах или 0, если узнать не удалось."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_series(counters: dict, histograms: dict, data: dict) -> None:
+    """Прибавить счётчики и гистограммы снимка к накопленным."""
+    for name, labels, value in data['counters']:
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, value in data['histograms']:
+        total = histograms.setdefault((name, labels), [0] * len(value))
+        for index, item in enumerate(value):
+            total[index] += item
+
+
+def dump_series(counters: dict, histograms: dict) -> dict:
+    return {
+        'counters': [[*key, value] for key, value in counters.items()],
+        'histograms': [[*key, value] for key, value in histograms.items()],
+    }
+
+
+def write_json(path: str, data: dict) -> None:
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(data, file)
+    os.replace(temp_path, path)
+
+
+def read_json(path: str):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def directory_lock(directory: str):
+    """Межпроцессная блокировка каталога метрик через flock."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, LOCK_NAME), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def read_snapshots(directory: str) -> list:
+    """
+    Прочитать снимки живых процессов и архив завершившихся.
+
+    Счётчики и гистограммы завершившегося процесса переносятся в архив,
+    а его файл удаляется: суммы не уменьшаются, когда воркер
+    перезапускается, и Prometheus не видит ложного сброса счётчиков.
+    Датчики вроде памяти процесса вместе с ним пропадают.
+    """
+    snapshots = []
+    archive_path = os.path.join(directory, ARCHIVE_NAME)
+    with directory_lock(directory):
+        archive = read_json(archive_path) or {
+            'counters': [], 'histograms': []
+        }
+        counters, histograms = {}, {}
+        merge_series(counters, histograms, archive)
+        dead = []
+        for file_name in os.listdir(directory):
+            if not file_name.endswith('.json') or file_name == ARCHIVE_NAME:
+                continue
+            path = os.path.join(directory, file_name)
+            data = read_json(path)
+            if data is None:
+                continue
+            if process_alive(data['pid']):
+                snapshots.append(data)
+            else:
+                merge_series(counters, histograms, data)
+                dead.append(path)
+        if dead:
+            archive = dump_series(counters, histograms)
+            write_json(archive_path, archive)
+            for path in dead:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    snapshots.append({**archive, 'gauges': []})
+    return snapshots
+
+
+class Registry:
+    """
+    Метрики процесса в памяти с периодическим сбросом в METRICS_DIR.
+
+    Под блокировкой только обновление словаря. Каждый процесс пишет
+    свой файл целиком через os.replace, а эндпоинт суммирует файлы
+    живых процессов и архив завершившихся; межпроцессная блокировка
+    берётся только на это чтение.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+        self.pid = os.getpid()
+        self.file_name = f'{self.pid}-{uuid.uuid4().hex[:8]}.json'
+        self.flushed_at = 0.0
+
+    def inc(self, name: str, labels: dict, value: float = 1) -> None:
+        key = (name, format_labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: dict, value: float) -> None:
+        key = (name, format_labels(labels))
+        index = bisect_left(BUCKETS, value)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(BUCKETS) + 2)
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {
+                key: list(value) for key, value in self.histograms.items()
+            }
+        pid_label = format_labels({'pid': self.pid})
+        return {
+            'pid': self.pid,
+            **dump_series(counters, histograms),
+            'gauges': [[
+                'yatube_process_resident_memory_bytes', pid_label,
+                resident_memory(),
+            ]],
+        }
+
+    def flush(self, force: bool = False) -> None:
+        """Записать снимок в файл процесса не чаще METRICS_FLUSH_INTERVAL."""
+        if os.getpid() != self.pid:
+            # Процесс форкнут после импорта: у него должен быть свой файл.
+            self.reset()
+        now = time.monotonic()
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if not force and now - self.flushed_at < interval:
+            return
+        self.flushed_at = now
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        write_json(
+            os.path.join(settings.METRICS_DIR, self.file_name),
+            self.snapshot(),
+        )
+
+    def collect(self) -> dict:
+        """Сложить снимки всех процессов из METRICS_DIR."""
+        self.flush(force=True)
+        counters, histograms, gauges = {}, {}, {}
+        for data in read_snapshots(settings.METRICS_DIR):
+            merge_series(counters, histograms, data)
+            for name, labels, value in data['gauges']:
+                gauges[(name, labels)] = value
+        return {
+            'counter': counters, 'histogram': histograms, 'gauge': gauges
+        }
+
+    def render(self) -> str:
+        """Вернуть метрики в текстовом формате Prometheus."""
+        collected = self.collect()
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            series = sorted(
+                (labels, value)
+                for (metric, labels), value in collected[kind].items()
+                if metric == name
+            )
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in series:
+                if kind == 'histogram':
+                    lines.extend(render_histogram(name, labels, value))
+                else:
+                    lines.append(f'{name}{{{labels}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def render_histogram(name: str, labels: str, value: list) -> list:
+    separator = ',' if labels else ''
+    lines = []
+    cumulative = 0
+    for bound, count in zip((*BUCKETS, '+Inf'), value[:-1]):
+        cumulative += count
+        lines.append(
+            f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}'
+        )
+    lines.append(f'{name}_sum{{{labels}}} {value[-1]}')
+    lines.append(f'{name}_count{{{labels}}} {cumulative}')
+    return lines
+
+
+registry = Registry()
+
+
+@atexit.register
+def flush_on_exit():
+    if registry.counters or registry.histograms:
+        registry.flush(force=True)
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper, считающая запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Собрать время ответа, коды и запросы к базе по представлениям."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            start = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        labels = {'view': view}
+        registry.inc('yatube_http_requests_total', {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+        })
+        registry.observe(
+            'yatube_http_request_duration_seconds', labels, duration
+        )
+        registry.inc('yatube_db_queries_total', labels, queries.count)
+        registry.inc(
+            'yatube_db_query_duration_seconds_total', labels, queries.duration
+        )
+        registry.flush()
+        return response
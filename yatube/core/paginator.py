@@ -0,0 +1,52 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from yatube.settings import ADMIN_COUNT_LIMIT
+
+
+def estimate_rows(queryset):
+    """
+    Оценить число строк таблицы модели по статистике базы.
+
+    Вернуть None, если оценка для базы недоступна.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s', [table]
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                'SELECT MAX(rowid) FROM {}'.format(
+                    connection.ops.quote_name(table)
+                )
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Пагинатор без точного COUNT по большим таблицам.
+
+    Для таблицы без фильтров число строк берётся из статистики базы.
+    С фильтром считается не больше ADMIN_COUNT_LIMIT строк: дальние
+    страницы недоступны, выборку нужно сузить фильтром или датой.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset)
+            if estimate is not None and estimate > ADMIN_COUNT_LIMIT:
+                return estimate
+        return queryset[:ADMIN_COUNT_LIMIT].count()
@@ -0,0 +1,143 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import uuid
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+REPORT_ID = re.compile(r'^[\w-]+$')
+TEMPLATE_RENDER = (
+    Template.render.__code__.co_filename,
+    Template.render.__code__.co_firstlineno,
+    Template.render.__code__.co_name,
+)
+
+
+class QueryTimer:
+    """Обёртка execute_wrapper, запоминающая время каждого запроса."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((perf_counter() - start, sql))
+
+
+class RequestProfilerMiddleware:
+    """
+    Профилировать запрос по требованию сотрудника или выборочно.
+
+    Профиль снимается, если сотрудник передал параметр
+    PROFILER_QUERY_PARAM или заголовок X-Profile, либо запрос попал в долю
+    PROFILER_SAMPLE_RATE. Отчёты складываются в PROFILER_DIR.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        return self.profile(request)
+
+    @staticmethod
+    def should_profile(request) -> bool:
+        requested = (
+            settings.PROFILER_QUERY_PARAM in request.GET
+            or 'HTTP_X_PROFILE' in request.META
+        )
+        if requested and request.user.is_staff:
+            return True
+        rate = settings.PROFILER_SAMPLE_RATE
+        return bool(rate) and random.random() < rate
+
+    def profile(self, request):
+        profiler = cProfile.Profile()
+        timer = QueryTimer()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            start = perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+                total = perf_counter() - start
+        report_id = save_report(request, response, profiler, timer, total)
+        response['X-Profile-Id'] = report_id
+        return response
+
+
+def save_report(request, response, profiler, timer, total) -> str:
+    """Сохранить текстовый отчёт и дамп cProfile, вернуть id отчёта."""
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+    report_id = '{}-{}'.format(
+        timezone.now().strftime('%Y%m%d-%H%M%S'), uuid.uuid4().hex[:8]
+    )
+    stats = pstats.Stats(profiler)
+    template_time = stats.stats.get(TEMPLATE_RENDER, (0, 0, 0, 0))[3]
+    sql_time = sum(duration for duration, sql in timer.queries)
+    output = io.StringIO()
+    output.write(
+        f'{request.method} {request.get_full_path()}\n'
+        f'Пользователь: {request.user}\n'
+        f'Статус: {response.status_code}\n'
+        f'Всего: {total * 1000:.1f} мс\n'
+        f'SQL: {len(timer.queries)} запросов, {sql_time * 1000:.1f} мс\n'
+        f'Шаблоны: {template_time * 1000:.1f} мс\n\n'
+        'Самые долгие запросы:\n'
+    )
+    for duration, sql in sorted(timer.queries, reverse=True)[:20]:
+        output.write(f'{duration * 1000:8.2f} мс  {sql}\n')
+    output.write('\n')
+    stats.stream = output
+    stats.sort_stats('cumulative').print_stats(50)
+    path = os.path.join(settings.PROFILER_DIR, report_id)
+    with open(f'{path}.txt', 'w') as report:
+        report.write(output.getvalue())
+    profiler.dump_stats(f'{path}.prof')
+    prune_reports()
+    return report_id
+
+
+def list_reports() -> list:
+    """Вернуть id сохранённых отчётов, начиная с новых."""
+    if not os.path.isdir(settings.PROFILER_DIR):
+        return []
+    return sorted(
+        (
+            name[:-len('.txt')]
+            for name in os.listdir(settings.PROFILER_DIR)
+            if name.endswith('.txt')
+        ),
+        reverse=True,
+    )
+
+
+def report_path(report_id: str, extension: str) -> str:
+    if not REPORT_ID.match(report_id):
+        raise ValueError('Неверный id отчёта')
+    return os.path.join(settings.PROFILER_DIR, f'{report_id}.{extension}')
+
+
+def prune_reports() -> None:
+    """Удалить старые отчёты сверх PROFILER_MAX_REPORTS."""
+    for report_id in list_reports()[settings.PROFILER_MAX_REPORTS:]:
+        for extension in ('txt', 'prof'):
+            try:
+                os.remove(report_path(report_id, extension))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,45 @@
+from django import template
+from django.template.base import NodeList
+from django.templatetags.cache import CacheNode, do_cache
+
+from core.metrics import registry
+
+register = template.Library()
+
+
+class RenderTrackingNodeList(NodeList):
+    """Содержимое {% cache %}, отмечающее, что его пришлось рендерить."""
+
+    def __init__(self, nodes, owner):
+        super().__init__(nodes)
+        self.contains_nontext = nodes.contains_nontext
+        self.owner = owner
+
+    def render(self, context):
+        context.render_context[self.owner] = True
+        return super().render(context)
+
+
+class MeteredCacheNode(CacheNode):
+    def __init__(self, node):
+        super().__init__(
+            node.nodelist, node.expire_time_var, node.fragment_name,
+            node.vary_on, node.cache_name,
+        )
+        self.nodelist = RenderTrackingNodeList(node.nodelist, self)
+
+    def render(self, context):
+        context.render_context[self] = False
+        value = super().render(context)
+        result = 'misses' if context.render_context.get(self) else 'hits'
+        registry.inc(
+            'yatube_fragment_cache_requests_total',
+            {'fragment': self.fragment_name, 'result': result},
+        )
+        return value
+
+
+@register.tag('cache')
+def metered_cache(parser, token):
+    """Тег {% cache %} Django со счётчиками попаданий для /metrics."""
+    return MeteredCacheNode(do_cache(parser, token))
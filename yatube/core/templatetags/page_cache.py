@@ -0,0 +1,51 @@
+from django import template
+from django.template.base import token_kwargs
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+HOLE_MARKER = '<!--hole:{}-->'
+
+
+class HoleNode(template.Node):
+    def __init__(self, template_name, extra_context):
+        self.template_name = template_name
+        self.extra_context = extra_context
+
+    def render(self, context):
+        template_name = self.template_name.resolve(context)
+        values = {
+            name: value.resolve(context)
+            for name, value in self.extra_context.items()
+        }
+        request = context.get('request')
+        if getattr(request, 'page_skeleton', False):
+            return mark_safe(HOLE_MARKER.format(
+                urlencode({'template': template_name, **values})
+            ))
+        included = context.template.engine.get_template(template_name)
+        with context.push(**values):
+            return included.render(context)
+
+
+@register.tag
+def hole(parser, token):
+    """
+    Подключить персональный фрагмент страницы.
+
+    При рендере скелета для кэша вместо фрагмента выводится метка,
+    которую core.cache.fill_holes заполняет для каждого запроса.
+    Аргументы передаются строками: {% hole "x.html" post_id=post.pk %}.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает имя шаблона'
+        )
+    extra_context = token_kwargs(bits[2:], parser)
+    if len(extra_context) != len(bits) - 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает только именованные аргументы'
+        )
+    return HoleNode(parser.compile_filter(bits[1]), extra_context)
@@ -1,6 +1,27 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 from http import HTTPStatus
+from io import StringIO
 
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .metrics import CONTENT_TYPE
+
+User = get_user_model()
+TEMP_PROFILER_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+MEDIA_CONTENT = b'0123456789'
 
 
 class ViewTestClass(TestCase):
@@ -13,3 +34,290 @@ class ViewTestClass(TestCase):
         """URL-адрес использует соответствующий шаблон."""
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+@override_settings(PROFILER_DIR=TEMP_PROFILER_DIR)
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILER_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_staff_can_profile_request(self):
+        """Сотрудник получает отчёт профилировщика по параметру."""
+        response = self.staff_client.get('/about/author/?_profile=1')
+        report_id = response['X-Profile-Id']
+        report = self.staff_client.get(
+            reverse('core:profiler_report', args=[report_id])
+        )
+        self.assertIn('SQL:', b''.join(report.streaming_content).decode())
+        self.assertIn(
+            report_id,
+            self.staff_client.get(
+                reverse('core:profiler_reports')
+            ).content.decode(),
+        )
+
+    def test_user_cannot_profile_request(self):
+        """Обычный пользователь не может включить профилировщик."""
+        response = self.authorized_client.get(
+            '/about/author/', HTTP_X_PROFILE='1'
+        )
+        self.assertNotIn('X-Profile-Id', response)
+        response = self.authorized_client.get(reverse('core:profiler_reports'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'file.txt'), 'wb') as file:
+            file.write(MEDIA_CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с ETag и поддержкой диапазонов."""
+        response = self.client.get('/media/file.txt')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), MEDIA_CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+
+    def test_range(self):
+        """Заголовок Range отдаёт часть файла."""
+        for header, content, content_range in (
+            ('bytes=2-5', MEDIA_CONTENT[2:6], 'bytes 2-5/10'),
+            ('bytes=7-', MEDIA_CONTENT[7:], 'bytes 7-9/10'),
+            ('bytes=-3', MEDIA_CONTENT[-3:], 'bytes 7-9/10'),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    '/media/file.txt', HTTP_RANGE=header
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content), content
+                )
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(int(response['Content-Length']), len(content))
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за пределами файла даёт 416."""
+        response = self.client.get('/media/file.txt', HTTP_RANGE='bytes=20-')
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304."""
+        etag = self.client.get('/media/file.txt')['ETag']
+        response = self.client.get('/media/file.txt', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_outside_media_root(self):
+        """Файлы вне MEDIA_ROOT недоступны."""
+        response = self.client.get('/media/../settings.py')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        """Отдачу файла можно передать фронтовому прокси."""
+        response = self.client.get('/media/file.txt')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/file.txt'
+        )
+        self.assertEqual(response.content, b'')
+
+
+class SqlitePragmaTests(TestCase):
+    def test_connection_pragmas(self):
+        """Новое соединение SQLite получает PRAGMA из профиля."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                settings.DATABASES['default']['OPTIONS']['timeout'] * 1000,
+            )
+
+    def test_stress_same_worker_counts(self):
+        """Потоки и процессы с одним числом воркеров не делят базу."""
+        out = StringIO()
+        call_command(
+            'sqlite_stress', profiles=['tuned'], threads=2, processes=2,
+            duration=0.1, rows=10, stdout=out,
+        )
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR, METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_metrics(self, **extra):
+        return self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret', **extra
+        )
+
+    def test_view_metrics(self):
+        """Запросы к представлению попадают в метрики."""
+        self.client.get(reverse('posts:index'))
+        response = self.get_metrics()
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        content = response.content.decode()
+        for line in (
+            'yatube_http_requests_total{method="GET",status="200",'
+            'view="posts:index"}',
+            'yatube_http_request_duration_seconds_bucket{view="posts:index",'
+            'le="+Inf"}',
+            'yatube_db_queries_total{view="posts:index"}',
+            'yatube_page_cache_requests_total{result="misses",view="index"}',
+            'yatube_process_resident_memory_bytes{pid="%d"}' % os.getpid(),
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, content)
+
+    def test_fragment_cache_metrics(self):
+        """Повторный рендер фрагмента считается попаданием."""
+        user = User.objects.create_user(username='reader')
+        self.client.force_login(user)
+        for _ in range(2):
+            self.client.get(reverse('posts:follow_index'))
+        content = self.get_metrics().content.decode()
+        self.assertIn(
+            'yatube_fragment_cache_requests_total{fragment="follow_page",'
+            'result="hits"}',
+            content,
+        )
+
+    def write_process(self, name: str, pid: int) -> str:
+        path = os.path.join(TEMP_METRICS_DIR, f'{name}.json')
+        with open(path, 'w') as file:
+            json.dump({
+                'pid': pid,
+                'counters': [['yatube_db_queries_total', f'view="{name}"', 5]],
+                'histograms': [],
+                'gauges': [[
+                    'yatube_process_resident_memory_bytes', f'pid="{name}"', 1
+                ]],
+            }, file)
+        return path
+
+    def test_processes_aggregated(self):
+        """Метрики других живых процессов складываются."""
+        self.write_process('other', os.getppid())
+        content = self.get_metrics().content.decode()
+        self.assertIn('yatube_db_queries_total{view="other"} 5', content)
+        self.assertIn('pid="other"', content)
+
+    def test_dead_processes_archived(self):
+        """Счётчики завершившихся процессов остаются, датчики пропадают."""
+        path = self.write_process('dead', 2 ** 22 + 1)
+        for _ in range(2):
+            content = self.get_metrics().content.decode()
+            self.assertIn('yatube_db_queries_total{view="dead"} 5', content)
+            self.assertNotIn('pid="dead"', content)
+        self.assertFalse(os.path.exists(path))
+        self.write_process('dead', 2 ** 22 + 1)
+        content = self.get_metrics().content.decode()
+        self.assertIn('yatube_db_queries_total{view="dead"} 10', content)
+
+    def test_token_required(self):
+        """Без токена метрики недоступны даже с локального адреса."""
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            with self.subTest(headers=headers):
+                response = self.client.get(
+                    reverse('metrics'), REMOTE_ADDR='127.0.0.1', **headers
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_disabled_without_token(self):
+        response = self.get_metrics()
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class SettingsProfileTests(TestCase):
+    def load_settings(self, **env) -> dict:
+        """Прочитать настройки в отдельном процессе с заданным окружением."""
+        result = subprocess.run(
+            [sys.executable, '-c', (
+                'import json\n'
+                'from yatube import settings as s\n'
+                'print(json.dumps({\n'
+                '    "debug": s.DEBUG,\n'
+                '    "apps": s.INSTALLED_APPS,\n'
+                '    "middleware": s.MIDDLEWARE,\n'
+                '    "loaders": s.TEMPLATES[0]["OPTIONS"].get("loaders"),\n'
+                '    "cache": s.CACHES["default"]["BACKEND"],\n'
+                '}))'
+            )],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout)
+
+    def test_production_profile(self):
+        """В production нет отладки и debug_toolbar, шаблоны кэшируются."""
+        config = self.load_settings(
+            YATUBE_ENV='production', YATUBE_SECRET_KEY='test'
+        )
+        self.assertFalse(config['debug'])
+        self.assertNotIn('debug_toolbar', config['apps'])
+        self.assertFalse(
+            any('debug_toolbar' in name for name in config['middleware'])
+        )
+        self.assertEqual(
+            config['loaders'][0][0], 'django.template.loaders.cached.Loader'
+        )
+        self.assertEqual(
+            config['cache'],
+            'django.core.cache.backends.filebased.FileBasedCache',
+        )
+
+    def test_production_memcached(self):
+        """Для нескольких серверов кэш переключается на memcached."""
+        config = self.load_settings(
+            YATUBE_ENV='production', YATUBE_SECRET_KEY='test',
+            YATUBE_MEMCACHED='127.0.0.1:11211',
+        )
+        self.assertEqual(
+            config['cache'],
+            'django.core.cache.backends.memcached.MemcachedCache',
+        )
+
+    def test_development_profile(self):
+        """По умолчанию остаётся профиль разработки."""
+        config = self.load_settings(YATUBE_ENV='development')
+        self.assertTrue(config['debug'])
+        self.assertIn('debug_toolbar', config['apps'])
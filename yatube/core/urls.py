@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('', views.profiler_reports, name='profiler_reports'),
+    path(
+        '<str:report_id>/',
+        views.profiler_report,
+        name='profiler_report'
+    ),
+    path(
+        '<str:report_id>/download/',
+        views.profiler_download,
+        name='profiler_download'
+    ),
+]
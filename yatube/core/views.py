@@ -1,6 +1,20 @@
+import mimetypes
+import os
 from http import HTTPStatus
+from stat import S_ISREG
+from urllib.parse import quote
 
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+
+from .media import RangeFile, media_path, parse_range
+from .metrics import CONTENT_TYPE, registry
+from .profiler import list_reports, report_path
 
 
 def page_not_found(request, exception):
@@ -13,12 +27,128 @@ def page_not_found(request, exception):
 
 
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html', HTTPStatus.FORBIDDEN)
+    return render(
+        request, 'core/403csrf.html', status=HTTPStatus.FORBIDDEN
+    )
 
 
 def server_error(request):
-    return render(request, 'core/500.html', HTTPStatus.INTERNAL_SERVER_ERROR)
+    return render(
+        request, 'core/500.html', status=HTTPStatus.INTERNAL_SERVER_ERROR
+    )
 
 
 def permission_denied(request, exception):
-    return render(request, 'core/403.html', HTTPStatus.FORBIDDEN)
+    return render(request, 'core/403.html', status=HTTPStatus.FORBIDDEN)
+
+
+@staff_member_required
+def profiler_reports(request):
+    return render(
+        request,
+        'core/profiler_reports.html',
+        {'reports': list_reports()}
+    )
+
+
+@staff_member_required
+def profiler_report(request, report_id):
+    try:
+        path = report_path(report_id, 'txt')
+    except ValueError:
+        raise Http404
+    if not os.path.exists(path):
+        raise Http404
+    return FileResponse(
+        open(path, 'rb'), content_type='text/plain; charset=utf-8'
+    )
+
+
+@staff_member_required
+def profiler_download(request, report_id):
+    try:
+        path = report_path(report_id, 'prof')
+    except ValueError:
+        raise Http404
+    if not os.path.exists(path):
+        raise Http404
+    return FileResponse(
+        open(path, 'rb'), as_attachment=True, filename=f'{report_id}.prof'
+    )
+
+
+def serve_media(request, path):
+    """
+    Отдать загруженный файл с поддержкой Range и условных запросов.
+
+    Если задан MEDIA_ACCEL_REDIRECT, тело отдаёт фронтовой прокси
+    по заголовку X-Accel-Redirect, а воркер только проверяет файл.
+    """
+    full_path = media_path(settings.MEDIA_ROOT, path)
+    try:
+        stat = os.stat(full_path) if full_path else None
+    except OSError:
+        stat = None
+    if stat is None or not S_ISREG(stat.st_mode):
+        raise Http404
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if not_modified is not None:
+        return not_modified
+    content_type = mimetypes.guess_type(full_path)[0]
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(
+            content_type=content_type or 'application/octet-stream'
+        )
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT + quote(path)
+        )
+    else:
+        response = media_file_response(
+            request, full_path, stat.st_size, etag
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = f'max-age={settings.MEDIA_CACHE_MAX_AGE}'
+    return response
+
+
+def media_file_response(request, full_path, size, etag):
+    """Отдать файл целиком или запрошенный диапазон через FileResponse."""
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if 'HTTP_RANGE' in request.META and if_range in (None, etag):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(
+            status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    media_file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(media_file)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(media_file, start, end - start + 1))
+        response.status_code = HTTPStatus.PARTIAL_CONTENT
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def metrics(request):
+    """
+    Отдать метрики всех процессов в формате Prometheus.
+
+    Доступ только с токеном METRICS_TOKEN в заголовке Authorization.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        raise Http404
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
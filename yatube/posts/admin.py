@@ -1,15 +1,52 @@
 from django.contrib import admin
 
+from core.paginator import ApproximateCountPaginator
+
 from .models import Comment, Follow, Group, Post
 
+# Префикс запроса, включающий поиск по неиндексированному тексту.
+TEXT_SEARCH_PREFIX = 'text:'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Настройки списка для таблиц с миллионами строк.
+
+    По умолчанию поиск идёт только по точному совпадению индексированных
+    полей: istartswith и iexact обычный индекс не используют. Поля из
+    text_search_fields просматриваются целиком, поэтому ищутся только
+    по явному запросу вида «text:слово».
+    """
+
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+    # date_hierarchy и list_editable не задаются: первая считает Min, Max
+    # и даты по всей таблице, второй рендерит форму на каждую строку.
+    text_search_fields = ('text',)
+
+    def get_search_results(self, request, queryset, search_term):
+        request.text_search = search_term.startswith(TEXT_SEARCH_PREFIX)
+        if request.text_search:
+            search_term = search_term[len(TEXT_SEARCH_PREFIX):]
+        return super().get_search_results(request, queryset, search_term)
+
+    def get_search_fields(self, request):
+        if getattr(request, 'text_search', False):
+            return self.text_search_fields
+        return [
+            field for field in self.search_fields
+            if field not in self.text_search_fields
+        ]
+
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
-    list_editable = ('group',)
-    search_fields = ('text',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
+    search_fields = ('text', 'author__username__exact')
     list_filter = ('pub_date', 'group')
-    empty_value_display = '-пусто-'
 
 
 @admin.register(Group)
@@ -22,18 +59,17 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('pk', 'post', 'author', 'text', 'pub_date')
-    list_editable = ('text',)
-    search_fields = ('post', 'author', 'created')
-    list_filter = ('author',)
-    empty_value_display = '-пусто-'
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    search_fields = ('author__username__exact', 'text')
+    list_filter = ('pub_date',)
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('pk', 'user', 'author')
-    list_editable = ('author', 'user')
-    search_fields = ('author', 'user')
-    list_filter = ('user', 'author')
-    empty_value_display = '-пусто-'
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('author', 'user')
+    search_fields = ('author__username__exact', 'user__username__exact')
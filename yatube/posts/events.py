@@ -0,0 +1,235 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.text import Truncator
+
+from yatube.settings import (EVENTS_HEARTBEAT, EVENTS_POLL_INTERVAL,
+                             EVENTS_QUEUE_SIZE, EVENTS_RETENTION,
+                             EVENTS_STREAM_TIMEOUT)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS events ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'author_id INTEGER NOT NULL, '
+    'payload TEXT NOT NULL, '
+    'created REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS events_created ON events (created)',
+)
+# Через столько миллисекунд браузер переподключается к потоку.
+RETRY_MS = 3000
+
+local = threading.local()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Вернуть соединение с базой событий, своё у каждого потока."""
+    path = settings.EVENTS_DB
+    if getattr(local, 'key', None) != (path, os.getpid()):
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        local.connection, local.key = connection, (path, os.getpid())
+    return local.connection
+
+
+def publish(author_id: int, payload: dict) -> None:
+    """Записать событие в общую для всех процессов базу."""
+    now = time.time()
+    connection = get_connection()
+    connection.execute(
+        'INSERT INTO events (author_id, payload, created) VALUES (?, ?, ?)',
+        (author_id, json.dumps(payload, ensure_ascii=False), now),
+    )
+    connection.execute(
+        'DELETE FROM events WHERE created < ?', (now - EVENTS_RETENTION,)
+    )
+
+
+def publish_post(post) -> None:
+    """Сообщить подписчикам автора о новом посте."""
+    try:
+        publish(post.author_id, {
+            'id': post.pk,
+            'author': post.author.username,
+            'text': Truncator(post.text).chars(200),
+            'url': reverse('posts:post_detail', args=[post.pk]),
+        })
+    except sqlite3.Error:
+        logger.exception('Не удалось опубликовать пост %s', post.pk)
+
+
+class Subscription:
+    """Ограниченная очередь событий одного подключения."""
+
+    def __init__(self, hub, author_ids):
+        self.hub = hub
+        self.author_ids = frozenset(author_ids)
+        self.queue = queue.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float):
+        """Дождаться события или вернуть None по таймауту."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """
+    Раздача событий подписчикам внутри процесса.
+
+    Один поток на процесс опрашивает базу событий и раскладывает новые
+    события по очередям подписок на их авторов, сами подписки потоков
+    не заводят. Поток запускается с первой подпиской и завершается,
+    когда подписок не осталось.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_author = defaultdict(set)
+        self.thread = None
+        self.pid = None
+        self.last_id = 0
+
+    def subscribe(self, author_ids, last_event_id=None) -> Subscription:
+        """
+        Подписаться на события авторов.
+
+        Если известен last_event_id, пропущенные с него события
+        берутся из базы, как после обрыва соединения.
+        """
+        subscription = Subscription(self, author_ids)
+        with self.lock:
+            self.start()
+            for author_id in subscription.author_ids:
+                self.by_author[author_id].add(subscription)
+            last_seen = self.last_id
+        if last_event_id is not None and last_event_id < last_seen:
+            rows = get_connection().execute(
+                'SELECT id, author_id, payload FROM events '
+                'WHERE id > ? AND id <= ? ORDER BY id',
+                (last_event_id, last_seen),
+            )
+            for event_id, author_id, payload in rows:
+                if author_id in subscription.author_ids:
+                    subscription.put((event_id, payload))
+                if subscription.overflowed:
+                    break
+        return subscription
+
+    def unsubscribe(self, subscription) -> None:
+        with self.lock:
+            for author_id in subscription.author_ids:
+                subscribers = self.by_author.get(author_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.by_author[author_id]
+
+    def start(self) -> None:
+        """Запустить поток опроса, если его нет в этом процессе."""
+        if (
+            self.thread is not None and self.thread.is_alive()
+            and self.pid == os.getpid()
+        ):
+            return
+        if self.pid != os.getpid():
+            self.by_author.clear()
+        self.pid = os.getpid()
+        self.last_id = get_connection().execute(
+            'SELECT COALESCE(MAX(id), 0) FROM events'
+        ).fetchone()[0]
+        self.thread = threading.Thread(
+            target=self.run, name='events-hub', daemon=True
+        )
+        self.thread.start()
+
+    def run(self) -> None:
+        while True:
+            time.sleep(EVENTS_POLL_INTERVAL)
+            with self.lock:
+                if not self.by_author:
+                    self.thread = None
+                    return
+            try:
+                self.poll()
+            except sqlite3.Error:
+                logger.exception('Ошибка чтения базы событий')
+
+    def poll(self) -> None:
+        """
+        Разложить события, появившиеся с прошлого опроса.
+
+        База читается без блокировки, чтобы subscribe и unsubscribe не
+        ждали её. Под блокировкой только выборка подписчиков и сдвиг
+        last_id: подписка, пришедшая до сдвига, получит эти события
+        отсюда, а пришедшая после — дочитает их из базы сама.
+        """
+        with self.lock:
+            last_id = self.last_id
+        rows = get_connection().execute(
+            'SELECT id, author_id, payload FROM events '
+            'WHERE id > ? ORDER BY id',
+            (last_id,),
+        ).fetchall()
+        if not rows:
+            return
+        with self.lock:
+            deliveries = [
+                (tuple(self.by_author.get(author_id, ())), event_id, payload)
+                for event_id, author_id, payload in rows
+            ]
+            self.last_id = rows[-1][0]
+        for subscriptions, event_id, payload in deliveries:
+            for subscription in subscriptions:
+                subscription.put((event_id, payload))
+
+
+hub = Hub()
+
+
+def event_stream(subscription):
+    """
+    Отдавать события подписки в формате text/event-stream.
+
+    Пока событий нет, раз в EVENTS_HEARTBEAT секунд уходит комментарий,
+    чтобы прокси не закрыли соединение. Через EVENTS_STREAM_TIMEOUT
+    поток завершается, и браузер переподключается с Last-Event-ID.
+    """
+    deadline = time.monotonic() + EVENTS_STREAM_TIMEOUT
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        while time.monotonic() < deadline:
+            event = subscription.get(EVENTS_HEARTBEAT)
+            if subscription.overflowed:
+                yield 'event: reset\ndata: {}\n\n'
+                return
+            if event is None:
+                yield ': ping\n\n'
+                continue
+            event_id, payload = event
+            yield f'id: {event_id}\nevent: post\ndata: {payload}\n\n'
+    finally:
+        subscription.close()
@@ -16,6 +16,17 @@ class PostForm(forms.ModelForm):
             "group": "Выберите группу",
         }
 
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, message in self.upload_errors.items():
+            if field in self.fields:
+                self.add_error(field, message)
+        return cleaned_data
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -27,3 +38,13 @@ class CommentForm(forms.ModelForm):
         help_texts = {
             "text": "Напишите текст комментария",
         }
+
+
+class ReplyForm(CommentForm):
+    """Комментарий, который может быть ответом на другой комментарий."""
+
+    class Meta(CommentForm.Meta):
+        fields = ("text", "parent")
+        widgets = {
+            "parent": forms.HiddenInput,
+        }
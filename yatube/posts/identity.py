@@ -0,0 +1,138 @@
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+
+from yatube.settings import (IDENTITY_CACHE_CHECK_INTERVAL,
+                             IDENTITY_CACHE_MISSING_TTL, IDENTITY_CACHE_SIZE,
+                             IDENTITY_CACHE_TTL)
+
+from .models import Group
+
+User = get_user_model()
+
+MISSING = object()
+
+
+def read_version(path: str):
+    try:
+        with open(path) as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def write_version(path: str) -> str:
+    """Атомарно записать в файл новую версию и вернуть её."""
+    version = f'{time.time_ns()}-{os.getpid()}'
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as file:
+        file.write(version)
+    os.replace(temp_path, path)
+    return version
+
+
+class IdentityCache:
+    """
+    Ограниченный LRU-кэш строк модели по уникальному полю в памяти процесса.
+
+    Хранятся только значения fields, каждый вызов собирает из них новый
+    экземпляр модели. Отсутствующие значения тоже запоминаются на
+    IDENTITY_CACHE_MISSING_TTL секунд, чтобы перебор несуществующих
+    адресов не доходил до базы. Сигналы сохранения и удаления вызывают
+    invalidate: кэш процесса сбрасывается сразу, а остальные процессы
+    замечают новую версию в файле IDENTITY_VERSION_DIR не позже чем через
+    IDENTITY_CACHE_CHECK_INTERVAL секунд.
+    """
+
+    def __init__(self, name: str, model, field: str, fields):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.fields = tuple(fields)
+        self.rows = OrderedDict()
+        self.lock = Lock()
+        self.version = None
+        self.generation = 0
+        self.checked = 0.0
+
+    @property
+    def version_path(self) -> str:
+        return os.path.join(
+            settings.IDENTITY_VERSION_DIR, f'{self.name}.version'
+        )
+
+    def check_version(self) -> None:
+        now = time.monotonic()
+        if now - self.checked < IDENTITY_CACHE_CHECK_INTERVAL:
+            return
+        version = read_version(self.version_path)
+        if version is None:
+            version = write_version(self.version_path)
+        with self.lock:
+            if version != self.version:
+                self.clear()
+                self.version = version
+            self.checked = now
+
+    def clear(self) -> None:
+        self.rows.clear()
+        self.generation += 1
+
+    def get(self, value):
+        """Вернуть экземпляр модели или None, если такого нет."""
+        self.check_version()
+        now = time.monotonic()
+        with self.lock:
+            row, expires = self.rows.get(value, (None, 0))
+            if expires > now:
+                self.rows.move_to_end(value)
+            else:
+                row = None
+            generation = self.generation
+        if row is None:
+            row = self.model.objects.filter(
+                **{self.field: value}
+            ).values_list(*self.fields).first() or MISSING
+            ttl = (
+                IDENTITY_CACHE_MISSING_TTL if row is MISSING
+                else IDENTITY_CACHE_TTL
+            )
+            with self.lock:
+                # Пока шёл запрос, кэш могли сбросить: строка устарела.
+                if generation == self.generation:
+                    self.rows[value] = row, now + ttl
+                    self.rows.move_to_end(value)
+                    if len(self.rows) > IDENTITY_CACHE_SIZE:
+                        self.rows.popitem(last=False)
+        if row is MISSING:
+            return None
+        return self.model.from_db(DEFAULT_DB_ALIAS, self.fields, row)
+
+    def get_or_404(self, value):
+        instance = self.get(value)
+        if instance is None:
+            raise Http404(f'{self.model._meta.verbose_name} не найден')
+        return instance
+
+    def invalidate(self) -> None:
+        """Сбросить кэш этого процесса и сменить версию для остальных."""
+        version = write_version(self.version_path)
+        with self.lock:
+            self.clear()
+            self.version = version
+
+
+groups = IdentityCache(
+    'group', Group, 'slug', ('id', 'title', 'slug', 'description')
+)
+# Только публичные поля профиля: пароль и почта в память не попадают.
+users = IdentityCache(
+    'user', User, 'username', ('id', 'username', 'first_name', 'last_name')
+)
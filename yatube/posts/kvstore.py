@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from yatube.settings import THUMBNAIL_LOCAL_CACHE_SIZE
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """
+    Хранилище sorl с локальным LRU перед общим кэшем и пакетным чтением.
+
+    Локально хранятся только найденные значения: записи о миниатюрах
+    не меняются после создания, а промах в другом процессе может
+    смениться готовой миниатюрой.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.local[key] = value
+            self.local.move_to_end(key)
+            while len(self.local) > THUMBNAIL_LOCAL_CACHE_SIZE:
+                self.local.popitem(last=False)
+
+    def _recall(self, key):
+        with self.lock:
+            value = self.local.get(key)
+            if value is not None:
+                self.local.move_to_end(key)
+            return value
+
+    def _forget(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.local.pop(key, None)
+
+    def _get_raw(self, key):
+        value = self._recall(key)
+        if value is None:
+            value = super()._get_raw(key)
+            if value is not None:
+                self._remember(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        self._forget(*keys)
+
+    def get_many(self, image_files) -> dict:
+        """
+        Прочитать записи для набора файлов: локально, одним get_many
+        из кэша и одним запросом к базе. Вернуть словарь имя -> ImageFile.
+        """
+        names = {add_prefix(image_file.key): image_file.name
+                 for image_file in image_files}
+        values = {}
+        for key in names:
+            value = self._recall(key)
+            if value is not None:
+                values[key] = value
+        missing = [key for key in names if key not in values]
+        if missing:
+            found = self.cache.get_many(missing)
+            not_cached = [key for key in missing if key not in found]
+            if not_cached:
+                stored = dict(
+                    KVStoreModel.objects.filter(
+                        key__in=not_cached
+                    ).values_list('key', 'value')
+                )
+                self.cache.set_many(
+                    {
+                        key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                        for key in not_cached
+                    },
+                    sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+                )
+                found.update(stored)
+            for key, value in found.items():
+                if value != cached_db_kvstore.EMPTY_VALUE:
+                    values[key] = value
+                    self._remember(key, value)
+        return {
+            names[key]: deserialize_image_file(value)
+            for key, value in values.items()
+        }
@@ -0,0 +1,117 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.cache import invalidate_tags
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Group,
+                          Post)
+from yatube.settings import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше заданного возраста вместе с комментариями '
+        'в архивные таблицы небольшими пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=ARCHIVE_AFTER_DAYS,
+            help='Возраст поста в днях, после которого он уходит в архив.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+            help='Сколько постов переносить в одной транзакции.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками в секундах.',
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='Остановиться после указанного числа пачек.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        moved = batches = 0
+        while options['max_batches'] is None or (
+            batches < options['max_batches']
+        ):
+            count = self.move_batch(cutoff, options['batch_size'])
+            if not count:
+                break
+            moved += count
+            batches += 1
+            self.stdout.write(f'Пачка {batches}: перенесено {count} постов')
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив постов: {moved}'
+        ))
+
+    @staticmethod
+    def move_batch(cutoff, batch_size: int) -> int:
+        """Перенести одну пачку самых старых постов в архив."""
+        with transaction.atomic():
+            posts = list(
+                Post.objects.filter(pub_date__lt=cutoff)
+                .order_by('pub_date')[:batch_size]
+            )
+            if not posts:
+                return 0
+            ids = [post.pk for post in posts]
+            ArchivedPost.objects.bulk_create(
+                ArchivedPost(
+                    id=post.pk,
+                    pub_date=post.pub_date,
+                    text=post.text,
+                    author_id=post.author_id,
+                    group_id=post.group_id,
+                    image=post.image.name,
+                    image_placeholder=post.image_placeholder,
+                )
+                for post in posts
+            )
+            ArchivedComment.objects.bulk_create(
+                ArchivedComment(
+                    id=comment.pk,
+                    pub_date=comment.pub_date,
+                    post_id=comment.post_id,
+                    author_id=comment.author_id,
+                    text=comment.text,
+                    parent_id=comment.parent_id,
+                    path=comment.path,
+                    depth=comment.depth,
+                )
+                for comment in Comment.objects.filter(
+                    post_id__in=ids
+                ).order_by('path')
+            )
+            # Удаляем без сигналов, одним запросом на таблицу: страницы
+            # сбрасываются ниже одним вызовом на всю пачку.
+            Comment.objects.filter(post_id__in=ids)._raw_delete(
+                Comment.objects.db
+            )
+            Post.objects.filter(pk__in=ids)._raw_delete(Post.objects.db)
+        # Архивный пост показывается без формы комментария и кнопки
+        # правки, поэтому закэшированные страницы постов, их авторов и
+        # групп сбрасываются после коммита.
+        usernames = User.objects.filter(
+            pk__in={post.author_id for post in posts}
+        ).values_list('username', flat=True)
+        slugs = Group.objects.filter(
+            pk__in={post.group_id for post in posts} - {None}
+        ).values_list('slug', flat=True)
+        invalidate_tags(
+            *(f'post-body:{pk}' for pk in ids),
+            *(f'post-comments:{pk}' for pk in ids),
+            *(f'profile:{username}' for username in usernames),
+            *(f'group:{slug}' for slug in slugs),
+        )
+        return len(posts)
@@ -0,0 +1,78 @@
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template import Context, engines
+from django.test import RequestFactory
+from django.utils import timezone
+
+from posts.models import Group, Post
+from yatube.settings import POST_PER_PAGE
+
+User = get_user_model()
+
+INCLUDE_LOOP = '''
+{% for post in page_obj %}
+  {% include "includes/post.html" %}
+  {% if not forloop.last %}<hr>{% endif %}
+{% endfor %}
+'''
+POST_LIST_TAG = '''
+{% load post_list %}
+{% render_post_list page_obj as posts_html %}
+{% for post_html in posts_html %}
+  {{ post_html }}
+  {% if not forloop.last %}<hr>{% endif %}
+{% endfor %}
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендера страницы ленты через include в цикле '
+        'и через тег render_post_list.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=POST_PER_PAGE,
+            help='Постов на странице.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=500,
+            help='Сколько раз рендерить страницу.',
+        )
+
+    def handle(self, *args, **options):
+        engine = engines['django'].engine
+        author = User(username='bench', first_name='Bench', last_name='User')
+        group = Group(title='Бенчмарк', slug='bench')
+        page_obj = [
+            Post(
+                pk=number,
+                text=f'Текст поста {number}\nВторая строка',
+                author=author,
+                group=group,
+                pub_date=timezone.now(),
+            )
+            for number in range(1, options['posts'] + 1)
+        ]
+        context = {'page_obj': page_obj, 'request': RequestFactory().get('/')}
+        results = {}
+        for name, source in (
+            ('include в цикле', INCLUDE_LOOP),
+            ('render_post_list', POST_LIST_TAG),
+        ):
+            template = engine.from_string(source)
+            template.render(Context(context))
+            start = perf_counter()
+            for _ in range(options['repeat']):
+                template.render(Context(context))
+            results[name] = (perf_counter() - start) / options['repeat']
+            self.stdout.write(
+                f'{name:>18}: {results[name] * 1000:.3f} мс на страницу'
+            )
+        baseline, optimized = results.values()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ускорение: {baseline / optimized:.2f}x'
+        ))
@@ -0,0 +1,310 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urljoin
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from posts.management.commands.seed import USERNAME_PREFIX
+from posts.models import Group, Post
+
+User = get_user_model()
+
+DEFAULT_MIX = (
+    'index=30,group_posts=25,profile=25,post_detail=10,'
+    'add_comment=5,follow=5'
+)
+SAMPLE_SIZE = 1000
+
+
+def percentile(values: list, share: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def parse_mix(value: str) -> dict:
+    try:
+        mix = {
+            name.strip(): float(weight)
+            for name, weight in (
+                item.split('=') for item in value.split(',') if item
+            )
+        }
+    except ValueError:
+        raise CommandError(f'Некорректная смесь запросов: {value}')
+    unknown = set(mix) - set(Worker.actions)
+    if unknown:
+        raise CommandError(f'Неизвестные запросы: {", ".join(unknown)}')
+    return mix
+
+
+class Stats:
+    """Замеры по запросам с накоплением за интервал и за весь прогон."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.interval = defaultdict(list)
+        self.total = defaultdict(list)
+
+    def add(self, endpoint: str, latency: float, ok: bool) -> None:
+        with self.lock:
+            self.interval[endpoint].append((latency, ok))
+            self.total[endpoint].append((latency, ok))
+
+    def take_interval(self) -> dict:
+        with self.lock:
+            interval, self.interval = self.interval, defaultdict(list)
+        return interval
+
+
+class Dataset:
+    """
+    Выборка адресов для запросов из базы, общей с сервером.
+
+    Берутся только пользователи из команды seed: пароль остальных
+    неизвестен, и вход за них не удастся.
+    """
+
+    def __init__(self):
+        self.usernames = list(
+            User.objects.filter(
+                username__regex=rf'^{USERNAME_PREFIX}\d+$'
+            ).values_list('username', flat=True)[:SAMPLE_SIZE]
+        )
+        self.slugs = list(
+            Group.objects.values_list('slug', flat=True)[:SAMPLE_SIZE]
+        )
+        self.post_ids = list(
+            Post.objects.values_list('pk', flat=True)[:SAMPLE_SIZE]
+        )
+        if not (self.usernames and self.post_ids):
+            raise CommandError(
+                'В базе нет пользователей seed или постов: заполните её '
+                'командой seed.'
+            )
+
+
+class Worker(threading.Thread):
+    """Пользователь со своей сессией, выполняющий смесь запросов."""
+
+    actions = (
+        'index', 'group_posts', 'profile', 'post_detail', 'add_comment',
+        'follow',
+    )
+
+    def __init__(self, base_url, username, password, dataset, mix, stats,
+                 deadline, think_time, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.dataset = dataset
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.stats = stats
+        self.deadline = deadline
+        self.think_time = think_time
+        self.random = random.Random(seed)
+        self.session = requests.Session()
+        self.following = set()
+
+    def url(self, name: str, *args) -> str:
+        return urljoin(self.base_url, reverse(name, args=args))
+
+    @staticmethod
+    def succeeded(response) -> bool:
+        """Успех: нет ошибки и нет переадресации на страницу входа."""
+        location = response.headers.get('Location', '')
+        return response.status_code < 400 and not location.startswith(
+            reverse('users:login')
+        )
+
+    def logged_in(self, response) -> bool:
+        """
+        Вход удался, только если форма переадресовала и выдала сессию.
+
+        При неверном пароле форма рендерится заново с кодом 200.
+        """
+        return (
+            response.is_redirect
+            and settings.SESSION_COOKIE_NAME in self.session.cookies
+        )
+
+    def request(self, endpoint: str, method: str, url: str, check=None,
+                **kwargs) -> bool:
+        if method == 'POST':
+            kwargs.setdefault('headers', {})['X-CSRFToken'] = (
+                self.session.cookies.get('csrftoken', '')
+            )
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, url, allow_redirects=False, timeout=30, **kwargs
+            )
+        except requests.RequestException:
+            ok = False
+        else:
+            ok = (check or self.succeeded)(response)
+        self.stats.add(endpoint, time.perf_counter() - start, ok)
+        return ok
+
+    def login(self) -> bool:
+        """Войти, записав в статистику и форму входа, и саму отправку."""
+        url = self.url('users:login')
+        if not self.request('login_form', 'GET', url):
+            return False
+        return self.request('login', 'POST', url, check=self.logged_in, data={
+            'username': self.username,
+            'password': self.password,
+        })
+
+    def run(self):
+        # Без сессии остальные запросы проверяли бы только переадресацию
+        # на вход, поэтому пользователь без входа выбывает; отказ уже
+        # учтён в статистике как ошибка login_form или login.
+        if not self.login():
+            return
+        while time.monotonic() < self.deadline:
+            action = self.random.choices(self.names, self.weights)[0]
+            getattr(self, f'do_{action}')()
+            if self.think_time:
+                time.sleep(self.random.expovariate(1 / self.think_time))
+
+    def do_index(self):
+        page = self.random.randint(1, 5)
+        self.request(
+            'index', 'GET', self.url('posts:index'), params={'page': page}
+        )
+
+    def do_group_posts(self):
+        if not self.dataset.slugs:
+            return self.do_index()
+        slug = self.random.choice(self.dataset.slugs)
+        self.request(
+            'group_posts', 'GET', self.url('posts:group_posts', slug)
+        )
+
+    def do_profile(self):
+        username = self.random.choice(self.dataset.usernames)
+        self.request('profile', 'GET', self.url('posts:profile', username))
+
+    def do_post_detail(self):
+        post_id = self.random.choice(self.dataset.post_ids)
+        self.request(
+            'post_detail', 'GET', self.url('posts:post_detail', post_id)
+        )
+
+    def do_add_comment(self):
+        post_id = self.random.choice(self.dataset.post_ids)
+        self.request(
+            'add_comment', 'POST', self.url('posts:add_comment', post_id),
+            data={'text': 'Комментарий нагрузочного теста'},
+        )
+
+    def do_follow(self):
+        if self.following and self.random.random() < 0.5:
+            username = self.following.pop()
+            self.request(
+                'unfollow', 'GET',
+                self.url('posts:profile_unfollow', username),
+            )
+            return
+        username = self.random.choice(self.dataset.usernames)
+        self.following.add(username)
+        self.request(
+            'follow', 'GET', self.url('posts:profile_follow', username)
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер смесью запросов от имени '
+        'пользователей из базы и печатает пропускную способность, '
+        'перцентили задержки и долю ошибок по адресам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://127.0.0.1:8000/',
+            help='Адрес сервера.',
+        )
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Число одновременных пользователей (потоков).',
+        )
+        parser.add_argument(
+            '--password', required=True,
+            help='Пароль пользователей тестовых данных.',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=60,
+            help='Длительность прогона в секундах.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=10,
+            help='Период промежуточных отчётов в секундах.',
+        )
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help='Веса запросов: имя=вес через запятую.',
+        )
+        parser.add_argument(
+            '--think-time', type=float, default=0.0,
+            help='Средняя пауза пользователя между запросами в секундах.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора для воспроизводимой нагрузки.',
+        )
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        dataset = Dataset()
+        stats = Stats()
+        started = time.monotonic()
+        deadline = started + options['duration']
+        workers = [
+            Worker(
+                options['url'],
+                dataset.usernames[number % len(dataset.usernames)],
+                options['password'], dataset, mix, stats, deadline,
+                options['think_time'], options['seed'] + number,
+            )
+            for number in range(options['users'])
+        ]
+        for worker in workers:
+            worker.start()
+        interval_start = started
+        while time.monotonic() < deadline:
+            time.sleep(max(
+                min(options['interval'], deadline - time.monotonic()), 0
+            ))
+            now = time.monotonic()
+            self.report(
+                f'{now - started:6.0f} с', stats.take_interval(),
+                now - interval_start,
+            )
+            interval_start = now
+        for worker in workers:
+            worker.join()
+        self.report('Итого', stats.total, time.monotonic() - started)
+
+    def report(self, title: str, samples: dict, elapsed: float) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for endpoint in sorted(samples):
+            latencies = sorted(latency for latency, _ in samples[endpoint])
+            errors = sum(not ok for _, ok in samples[endpoint])
+            count = len(latencies)
+            self.stdout.write(
+                f'  {endpoint:>12}: {count / elapsed:8.1f} запр/с'
+                f'  p50 {percentile(latencies, 0.5) * 1000:7.1f}'
+                f'  p95 {percentile(latencies, 0.95) * 1000:7.1f}'
+                f'  p99 {percentile(latencies, 0.99) * 1000:7.1f} мс'
+                f'  ошибок {errors / count:6.1%}'
+            )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.uploads import process_post_image
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет размеры и размытые заглушки изображений постов, '
+        'загруженных до их появления.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Обработать заново все изображения, а не только новые.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(image_placeholder='')
+        processed = 0
+        for post_id in posts.values_list('pk', flat=True).iterator():
+            process_post_image(post_id)
+            processed += 1
+        self.stdout.write(f'Обработано изображений: {processed}')
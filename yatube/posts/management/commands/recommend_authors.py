@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Follow, Recommendation
+from posts.recommendations import FollowGraph, save_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает рекомендации авторов по графу подписок. По умолчанию '
+        'только для пользователей, чьи подписки изменились.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать рекомендации всех пользователей с подписками.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Пользователей в одной транзакции записи.',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        graph = FollowGraph()
+        loaded = time.perf_counter()
+        if options['all']:
+            user_ids = list(graph.users())
+        else:
+            stale = Recommendation.objects.filter(stale=True).values_list(
+                'user_id', flat=True
+            )
+            missing = Follow.objects.filter(
+                user__recommendation__isnull=True
+            ).values_list('user_id', flat=True).distinct()
+            user_ids = sorted(set(stale) | set(missing))
+        saved = 0
+        for offset in range(0, len(user_ids), options['batch_size']):
+            saved += save_recommendations(
+                graph, user_ids[offset:offset + options['batch_size']]
+            )
+        self.stdout.write(
+            f'Граф: {len(graph.following.values)} подписок за '
+            f'{loaded - start:.1f} с; рекомендации: {saved} пользователей '
+            f'за {time.perf_counter() - loaded:.1f} с'
+        )
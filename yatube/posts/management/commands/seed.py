@@ -0,0 +1,287 @@
+import random
+import time
+from array import array
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, comment_path_segment
+
+User = get_user_model()
+
+WORDS = (
+    'город лето дорога утро книга море ветер кофе друг поезд вечер '
+    'работа песня дом окно солнце снег река лес музыка фото новость '
+    'идея проект встреча праздник кино история путь небо время'
+).split()
+# Имена созданных пользователей: seed<id>. По префиксу loadtest находит
+# пользователей, для которых известен пароль.
+USERNAME_PREFIX = 'seed'
+# Показатель степенного распределения активности и популярности авторов.
+PARETO_ALPHA = 1.2
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def row_values(defaults: dict, row: dict) -> tuple:
+    """
+    Разложить строку-словарь по порядку колонок модели.
+
+    Ключи — attname полей; не заданные поля получают значение
+    по умолчанию, поэтому новые колонки не сдвигают остальные.
+    """
+    unknown = row.keys() - defaults.keys()
+    if unknown:
+        raise CommandError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return tuple(row.get(name, default) for name, default in defaults.items())
+
+
+def table_indexes(cursor, table: str) -> list:
+    """
+    Вернуть (имя, SQL) вторичных индексов таблицы.
+
+    Индексы ограничений уникальности и первичного ключа не трогаем.
+    """
+    if connection.vendor == 'sqlite':
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = %s AND sql IS NOT NULL",
+            [table],
+        )
+    elif connection.vendor == 'postgresql':
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes '
+            'WHERE tablename = %s AND indexname NOT IN '
+            '(SELECT conname FROM pg_constraint)',
+            [table],
+        )
+    else:
+        return []
+    return cursor.fetchall()
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро заполняет базу воспроизводимыми тестовыми данными: '
+        'пользователями, группами, постами, комментариями и подписками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок пользователя.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить публикации.',
+        )
+        parser.add_argument(
+            '--password', default='yatube-seed',
+            help='Пароль всех созданных пользователей.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=50000,
+            help='Строк в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.span = timedelta(days=options['days']).total_seconds()
+        tables = [model._meta.db_table for model in (Post, Comment, Follow)]
+        with connection.cursor() as cursor:
+            indexes = [
+                index for table in tables
+                for index in table_indexes(cursor, table)
+            ]
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        try:
+            self.seed(options)
+        finally:
+            start = time.perf_counter()
+            with connection.cursor() as cursor:
+                for _, sql in indexes:
+                    cursor.execute(sql)
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [User, Group, Post, Comment, Follow]
+                ):
+                    cursor.execute(sql)
+            self.stdout.write(
+                f'Индексы: {len(indexes)} за '
+                f'{time.perf_counter() - start:.1f} с'
+            )
+        cache.clear()
+
+    def seed(self, options):
+        users = self.first_id(User), options['users']
+        groups = self.first_id(Group), options['groups']
+        posts = self.first_id(Post), options['posts']
+        # Общие веса: активные авторы чаще пишут и на них чаще подписаны.
+        self.author_weights = array('d', accumulate(
+            self.random.paretovariate(PARETO_ALPHA)
+            for _ in range(users[1])
+        ))
+        self.insert(User, self.user_rows(*users, options['password']))
+        self.insert(Group, self.group_rows(*groups))
+        self.insert(Post, self.post_rows(*posts, users, groups))
+        self.insert(Comment, self.comment_rows(
+            self.first_id(Comment), options['comments'], posts, users
+        ))
+        self.insert(Follow, self.follow_rows(
+            self.first_id(Follow), users, options['follows']
+        ))
+
+    @staticmethod
+    def first_id(model) -> int:
+        return (model.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
+
+    def insert(self, model, rows) -> None:
+        """Вставить строки пачками executemany в отдельных транзакциях."""
+        fields = model._meta.concrete_fields
+        columns = [field.column for field in fields]
+        defaults = {field.attname: field.get_default() for field in fields}
+        rows = (row_values(defaults, row) for row in rows)
+        sql = 'INSERT INTO {} ({}) VALUES '.format(
+            connection.ops.quote_name(model._meta.db_table),
+            ', '.join(map(connection.ops.quote_name, columns)),
+        )
+        placeholders = '({})'.format(', '.join(['%s'] * len(columns)))
+        start = time.perf_counter()
+        total = 0
+        for chunk in chunks(rows, self.batch_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    # executemany в psycopg2 ходит в базу за каждой строкой.
+                    from psycopg2.extras import execute_values
+                    execute_values(
+                        cursor.cursor, sql + '%s', chunk, page_size=1000
+                    )
+                else:
+                    cursor.executemany(sql + placeholders, chunk)
+            total += len(chunk)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{model._meta.db_table}: {total} строк за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с)'
+        )
+
+    def datetime(self, seconds_ago: float):
+        return connection.ops.adapt_datetimefield_value(
+            self.now - timedelta(seconds=seconds_ago)
+        )
+
+    def author(self, users) -> int:
+        first_id, _ = users
+        return first_id + self.random.choices(
+            range(len(self.author_weights)),
+            cum_weights=self.author_weights,
+        )[0]
+
+    def text(self, low: int, high: int) -> str:
+        words = self.random.choices(WORDS, k=self.random.randint(low, high))
+        return ' '.join(words).capitalize()
+
+    def post_age(self, number: int, count: int) -> float:
+        """
+        Возраст поста с номером number в секундах.
+
+        Частота публикаций растёт линейно со временем, поэтому доля
+        постов, написанных к моменту t, равна квадрату доли прошедшего
+        к этому моменту времени. Номера постов идут по дате.
+        """
+        return self.span * (1 - ((number + 1) / count) ** 0.5)
+
+    def user_rows(self, first_id, count, password):
+        password = make_password(password)
+        for user_id in range(first_id, first_id + count):
+            joined = self.datetime(self.span * self.random.random())
+            yield {
+                'id': user_id,
+                'password': password,
+                'username': f'{USERNAME_PREFIX}{user_id}',
+                'date_joined': joined,
+            }
+
+    def group_rows(self, first_id, count):
+        for group_id in range(first_id, first_id + count):
+            yield {
+                'id': group_id,
+                'title': f'Группа {group_id}',
+                'slug': f'seed-{group_id}',
+                'description': self.text(10, 30),
+            }
+
+    def post_rows(self, first_id, count, users, groups):
+        group_first_id, group_count = groups
+        for number in range(count):
+            group_id = None
+            if group_count and self.random.random() < 0.7:
+                group_id = group_first_id + min(
+                    int(self.random.paretovariate(PARETO_ALPHA)) - 1,
+                    group_count - 1,
+                )
+            yield {
+                'id': first_id + number,
+                'pub_date': self.datetime(self.post_age(number, count)),
+                'text': self.text(5, 60),
+                'author_id': self.author(users),
+                'group_id': group_id,
+                'image': '',
+            }
+
+    def comment_rows(self, first_id, count, posts, users):
+        post_first_id, post_count = posts
+        if not post_count:
+            return
+        for comment_id in range(first_id, first_id + count):
+            # Свежие посты обсуждают чаще старых.
+            number = post_count - 1 - int(
+                post_count * self.random.random() ** 3
+            )
+            age = self.post_age(number, post_count)
+            yield {
+                'id': comment_id,
+                'pub_date': self.datetime(age * self.random.random()),
+                'post_id': post_first_id + number,
+                'author_id': self.author(users),
+                'text': self.text(3, 25),
+                'path': comment_path_segment(comment_id),
+                'depth': 0,
+            }
+
+    def follow_rows(self, first_id, users, average):
+        user_first_id, user_count = users
+        follow_id = first_id
+        for user_id in range(user_first_id, user_first_id + user_count):
+            count = min(
+                int(self.random.expovariate(1 / average)) if average else 0,
+                user_count - 1,
+            )
+            authors = {self.author(users) for _ in range(count)} - {user_id}
+            for author_id in sorted(authors):
+                yield {
+                    'id': follow_id, 'user_id': user_id, 'author_id': author_id
+                }
+                follow_id += 1
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.warmup import (HttpFetcher, LocalFetcher, page_tasks,
+                          thumbnail_tasks, warm, warmup_urls)
+from yatube.settings import (WARMUP_GROUPS, WARMUP_INDEX_PAGES,
+                             WARMUP_POSTS, WARMUP_PROFILES, WARMUP_WORKERS)
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэш страниц и миниатюр после деплоя: первые страницы '
+        'главной, самые активные группы и авторы, последние посты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help=(
+                'Адрес запущенного сервера. Без него страницы рендерятся в '
+                'этом процессе, что прогревает только общий кэш, а не '
+                'LocMemCache рабочих процессов.'
+            ),
+        )
+        parser.add_argument(
+            '--index-pages', type=int, default=WARMUP_INDEX_PAGES
+        )
+        parser.add_argument('--groups', type=int, default=WARMUP_GROUPS)
+        parser.add_argument('--profiles', type=int, default=WARMUP_PROFILES)
+        parser.add_argument('--posts', type=int, default=WARMUP_POSTS)
+        parser.add_argument('--workers', type=int, default=WARMUP_WORKERS)
+
+    def handle(self, *args, **options):
+        urls = warmup_urls(
+            options['index_pages'], options['groups'],
+            options['profiles'], options['posts'],
+        )
+        if options['url']:
+            tasks = page_tasks(urls, HttpFetcher(options['url']))
+        else:
+            # Миниатюры вперёд, чтобы страницы не создавали их сами.
+            tasks = thumbnail_tasks(options['posts']) + page_tasks(
+                urls, LocalFetcher()
+            )
+        start = time.perf_counter()
+        results = warm(tasks, options['workers'], self.progress)
+        failed = [name for name, status, _ in results if status != 200]
+        self.stdout.write(
+            f'Прогрето {len(results) - len(failed)} из {len(results)} '
+            f'за {time.perf_counter() - start:.1f} с'
+        )
+        for name in failed:
+            self.stderr.write(f'Ошибка: {name}')
+
+    def progress(self, done, total, name, status, elapsed):
+        self.stdout.write(
+            f'[{done}/{total}] {status} {elapsed * 1000:.0f} мс {name}'
+        )
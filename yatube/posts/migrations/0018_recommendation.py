@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0017_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('author_ids', models.TextField(blank=True, verbose_name='Рекомендованные авторы')),
+                ('stale', models.BooleanField(db_index=True, default=False, verbose_name='Требует пересчёта')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Время расчёта')),
+            ],
+            options={
+                'verbose_name': 'Рекомендации авторов',
+                'verbose_name_plural': 'Рекомендации авторов',
+            },
+        ),
+    ]
@@ -1,15 +1,22 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.db.models import UniqueConstraint
 
+from yatube.settings import COMMENT_MAX_DEPTH
+
 User = get_user_model()
 
 
+def comment_path_segment(pk: int) -> str:
+    return f'{pk:010d}'
+
+
 class Posts(models.Model):
     pub_date = models.DateTimeField(
         'Время публикации',
         auto_now_add=True,
-        null=True
+        null=True,
+        db_index=True
     )
 
     class Meta:
@@ -52,6 +59,12 @@ class Post(Posts):
         blank=True,
         null=True,
     )
+    image_placeholder = models.TextField(
+        'Заглушка картинки',
+        blank=True,
+        editable=False,
+        help_text='Размытая копия в виде data: URI, видна до загрузки',
+    )
 
     class Meta:
         verbose_name = 'Администрирование поста'
@@ -79,15 +92,49 @@ class Comment(Posts):
         'Текст комментария',
         help_text='Введите текст комментария'
     )
+    parent = models.ForeignKey(
+        'self',
+        verbose_name='Ответ на',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies'
+    )
+    # Идентификаторы предков и самого комментария, дополненные нулями
+    # и разделённые точкой: сортировка по path выстраивает ветки.
+    path = models.CharField(max_length=255, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
 
     class Meta:
         verbose_name = 'Администрирование комментария'
         verbose_name_plural = 'Администрирование комментариев'
         ordering = ('-pub_date',)
+        indexes = [models.Index(fields=['post', 'path'])]
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """
+        Заполнить path и depth нового комментария.
+
+        Ответ глубже COMMENT_MAX_DEPTH прикрепляется к предку
+        на последнем допустимом уровне.
+        """
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        prefix = []
+        if self.parent is not None:
+            ancestors = self.parent.path.split('.')
+            prefix = ancestors[:COMMENT_MAX_DEPTH]
+            if len(prefix) < len(ancestors):
+                self.parent = Comment.objects.get(pk=int(prefix[-1]))
+            self.depth = len(prefix)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.path = '.'.join(prefix + [comment_path_segment(self.pk)])
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -106,7 +153,117 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Администрирование подписки'
         verbose_name_plural = 'Администрирование подписок'
-        UniqueConstraint(fields=['user', 'author'], name='unique_following')
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'author'], name='unique_following'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user} → {self.author}'
+
+
+class Recommendation(models.Model):
+    user = models.OneToOneField(
+        User,
+        verbose_name='Пользователь',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='recommendation'
+    )
+    # Идентификаторы авторов через запятую, по убыванию оценки.
+    author_ids = models.TextField('Рекомендованные авторы', blank=True)
+    stale = models.BooleanField(
+        'Требует пересчёта',
+        default=False,
+        db_index=True
+    )
+    updated = models.DateTimeField('Время расчёта', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Рекомендации авторов'
+        verbose_name_plural = 'Рекомендации авторов'
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class ArchivedPost(models.Model):
+    id = models.IntegerField(primary_key=True)
+    pub_date = models.DateTimeField(
+        'Время публикации',
+        null=True,
+        db_index=True
+    )
+    text = models.TextField('Текст поста')
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        verbose_name='Группа',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        null=True,
+    )
+    image_placeholder = models.TextField(
+        'Заглушка картинки',
+        blank=True,
+        editable=False,
+        help_text='Размытая копия в виде data: URI, видна до загрузки',
+    )
+
+    class Meta:
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        ordering = ('-pub_date',)
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    pub_date = models.DateTimeField('Время публикации', null=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    text = models.TextField('Текст комментария')
+    parent = models.ForeignKey(
+        'self',
+        verbose_name='Ответ на',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies'
+    )
+    path = models.CharField(max_length=255, default='')
+    depth = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        ordering = ('-pub_date',)
+        indexes = [models.Index(fields=['post', 'path'])]
 
     def __str__(self) -> str:
         return self.text[:15]
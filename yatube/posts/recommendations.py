@@ -0,0 +1,130 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from yatube.settings import (RECOMMENDATIONS_FOLLOWERS_SAMPLE,
+                             RECOMMENDATIONS_SHOWN, RECOMMENDATIONS_STORED)
+
+from .models import Follow, Recommendation
+
+User = get_user_model()
+
+# Сколько самых близких авторов помнить для каждого автора.
+NEIGHBORS = 50
+
+
+class Adjacency:
+    """
+    Списки смежности в формате CSR на массивах array.
+
+    keys — отсортированные идентификаторы вершин, соседи вершины keys[i]
+    лежат в values[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, pairs):
+        self.keys = array('q')
+        self.offsets = array('q', [0])
+        self.values = array('q')
+        for key, value in pairs:
+            if not self.keys or self.keys[-1] != key:
+                if self.keys:
+                    self.offsets.append(len(self.values))
+                self.keys.append(key)
+            self.values.append(value)
+        if self.keys:
+            self.offsets.append(len(self.values))
+
+    def __getitem__(self, key) -> array:
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return array('q')
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+
+class FollowGraph:
+    """Граф подписок: кто на кого подписан и кто подписан на автора."""
+
+    def __init__(self):
+        follows = Follow.objects.values_list('user_id', 'author_id')
+        self.following = Adjacency(
+            follows.order_by('user_id', 'author_id').iterator()
+        )
+        self.followers = Adjacency(
+            (author, user) for user, author in
+            follows.order_by('author_id', 'user_id').iterator()
+        )
+        self.neighbors_cache = {}
+
+    def neighbors(self, author_id: int) -> Counter:
+        """
+        Авторы, на которых чаще всего подписаны подписчики автора.
+
+        У популярных авторов берётся равномерная выборка подписчиков.
+        """
+        neighbors = self.neighbors_cache.get(author_id)
+        if neighbors is None:
+            followers = self.followers[author_id]
+            step = max(len(followers) // RECOMMENDATIONS_FOLLOWERS_SAMPLE, 1)
+            counter = Counter()
+            for follower in followers[::step]:
+                counter.update(self.following[follower])
+            counter.pop(author_id, None)
+            neighbors = self.neighbors_cache[author_id] = Counter(
+                dict(counter.most_common(NEIGHBORS))
+            )
+        return neighbors
+
+    def recommend(self, user_id: int) -> list:
+        """Вернуть авторов для пользователя по убыванию оценки."""
+        followed = self.following[user_id]
+        scores = Counter()
+        for author_id in followed:
+            scores.update(self.neighbors(author_id))
+        for author_id in (*followed, user_id):
+            scores.pop(author_id, None)
+        return [
+            author_id
+            for author_id, _ in scores.most_common(RECOMMENDATIONS_STORED)
+        ]
+
+    def users(self):
+        return iter(self.following.keys)
+
+
+def save_recommendations(graph: FollowGraph, user_ids) -> int:
+    """Пересчитать и записать рекомендации для пользователей."""
+    recommendations = [
+        Recommendation(
+            user_id=user_id,
+            author_ids=','.join(map(str, graph.recommend(user_id))),
+        )
+        for user_id in user_ids
+    ]
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.bulk_create(recommendations)
+    return len(recommendations)
+
+
+def mark_stale(user) -> None:
+    """Отметить, что подписки пользователя изменились."""
+    Recommendation.objects.filter(user=user, stale=False).update(stale=True)
+
+
+def get_recommended_authors(user) -> list:
+    """Вернуть рекомендованных авторов, на которых пользователь не подписан."""
+    if not user.is_authenticated:
+        return []
+    stored = Recommendation.objects.filter(user=user).values_list(
+        'author_ids', flat=True
+    ).first()
+    if not stored:
+        return []
+    ids = [int(author_id) for author_id in stored.split(',')]
+    authors = User.objects.filter(pk__in=ids).exclude(
+        following__user=user
+    ).only('username', 'first_name', 'last_name').in_bulk()
+    return [authors[pk] for pk in ids if pk in authors][:RECOMMENDATIONS_SHOWN]
@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from time import perf_counter
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.signing import Signer
+from django.utils.crypto import constant_time_compare
+from PIL import Image, ImageOps
+
+from core.media import media_path
+from core.metrics import registry
+from yatube.settings import THUMB_LOCK_STRIPES, THUMB_QUALITY, THUMB_SIZES
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+THUMB_DIR = 'thumb'
+CROPS = ('crop', 'fit')
+
+signer = Signer(salt='posts.resize')
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def thumb_name(path: str, width: int, height: int, crop: str) -> str:
+    """Путь миниатюры внутри MEDIA_ROOT, он же хвост её адреса."""
+    return f'{THUMB_DIR}/{width}x{height}/{crop}/{path}'
+
+
+def thumb_url(path: str, width: int, height: int, crop: str = 'crop') -> str:
+    """Подписанный адрес миниатюры файла из MEDIA_ROOT."""
+    name = thumb_name(path, width, height, crop)
+    return f'{settings.MEDIA_URL}{quote(name)}?s={signer.signature(name)}'
+
+
+def is_allowed(width: int, height: int, crop: str) -> bool:
+    return crop in CROPS and f'{width}x{height}' in THUMB_SIZES
+
+
+def thumb_exists(name: str) -> bool:
+    target = media_path(settings.MEDIA_ROOT, name)
+    return target is not None and os.path.isfile(target)
+
+
+def check_signature(name: str, signature: str) -> bool:
+    return constant_time_compare(signature, signer.signature(name))
+
+
+@contextmanager
+def file_lock(name: str):
+    """
+    Межпроцессная блокировка ключа через flock.
+
+    Ключи распределены по THUMB_LOCK_STRIPES файлам, чтобы не плодить
+    файл блокировки на каждую миниатюру.
+    """
+    if fcntl is None:
+        yield
+        return
+    stripe = zlib.crc32(name.encode()) % THUMB_LOCK_STRIPES
+    directory = os.path.join(settings.MEDIA_ROOT, THUMB_DIR, '.locks')
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f'{stripe}.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+@contextmanager
+def key_lock(name: str):
+    """
+    Блокировка одного ключа в процессе и между процессами.
+
+    Потоки с одним ключом ждут на общем Lock, который удаляется из
+    словаря, когда его перестают ждать.
+    """
+    with _locks_lock:
+        entry = _locks.setdefault(name, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0], file_lock(name):
+            yield
+    finally:
+        with _locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _locks[name]
+
+
+def resize(source: str, target: str, width: int, height: int,
+           crop: str) -> None:
+    """Уменьшить изображение и атомарно записать результат в target."""
+    with Image.open(source) as image:
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        if crop == 'crop':
+            image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            image.thumbnail((width, height), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    temp_path = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        image.save(temp_path, image_format, quality=THUMB_QUALITY)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def ensure_thumb(path: str, width: int, height: int, crop: str):
+    """
+    Вернуть путь к файлу миниатюры, создав его при первом обращении.
+
+    Одновременные первые запросы одной миниатюры ждут блокировку ключа,
+    и Pillow уменьшает изображение ровно один раз. Вернуть None, если
+    исходного файла нет или его не удалось прочитать.
+    """
+    name = thumb_name(path, width, height, crop)
+    target = media_path(settings.MEDIA_ROOT, name)
+    source = media_path(settings.MEDIA_ROOT, path)
+    if target is None or source is None or path.startswith(f'{THUMB_DIR}/'):
+        return None
+    if os.path.isfile(target):
+        return target
+    if not os.path.isfile(source):
+        return None
+    with key_lock(name):
+        if os.path.isfile(target):
+            return target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        start = perf_counter()
+        try:
+            resize(source, target, width, height, crop)
+        except (OSError, SyntaxError, ValueError,
+                Image.DecompressionBombError):
+            logger.warning('Не удалось уменьшить изображение %s', path)
+            return None
+        registry.observe(
+            'yatube_thumbnail_generation_seconds',
+            {'geometry': f'{width}x{height}'},
+            perf_counter() - start,
+        )
+    return target
@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidate_tags
+
+from .identity import groups, users
+from .models import Comment, Group, Post
+from .utils import (LATEST_POST_KEY, LATEST_POST_TIMEOUT, POST_AUTHOR_KEY,
+                    USERNAME_KEY)
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    """Запомнить исходную группу поста, чтобы сбросить и её страницу."""
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_init, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    """Запомнить исходный слаг группы."""
+    instance._initial_slug = instance.slug
+
+
+def author_username(post):
+    """Имя автора поста без загрузки всей строки пользователя."""
+    if Post.author.field.is_cached(post):
+        return post.author.username
+    return User.objects.filter(pk=post.author_id).values_list(
+        'username', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    """Сбросить страницы поста, его автора и групп."""
+    group_ids = {instance.group_id, instance._initial_group_id} - {None}
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True
+    ) if group_ids else []
+    username = author_username(instance)
+    invalidate_tags(
+        f'post-body:{instance.pk}',
+        *((f'profile:{username}',) if username else ()),
+        *(f'group:{slug}' for slug in slugs),
+    )
+    cache.delete(POST_AUTHOR_KEY.format(instance.pk))
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+def remember_latest_post(sender, instance, created, **kwargs):
+    """Запомнить новый пост как самый свежий для опроса ленты."""
+    if created:
+        cache.set(
+            LATEST_POST_KEY, (instance.pk, instance.pub_date),
+            LATEST_POST_TIMEOUT,
+        )
+
+
+@receiver(post_delete, sender=Post)
+def forget_latest_post(sender, instance, **kwargs):
+    """Пересчитать самый свежий пост при следующем опросе."""
+    cache.delete(LATEST_POST_KEY)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Сбросить комментарии поста, не трогая кэш его текста."""
+    invalidate_tags(f'post-comments:{instance.post_id}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    """Сбросить страницы, на которых выводится группа."""
+    invalidate_tags(
+        'groups',
+        f'group:{instance.slug}',
+        f'group:{instance._initial_slug}',
+    )
+    instance._initial_slug = instance.slug
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_identity(sender, **kwargs):
+    """Сбросить кэш групп по слагу во всех процессах."""
+    groups.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_identity(sender, update_fields=None, **kwargs):
+    """
+    Сбросить кэш профилей по имени во всех процессах.
+
+    Сохранения, не затронувшие публичных полей, например last_login
+    при входе, кэш не трогают.
+    """
+    if update_fields and not set(update_fields) & set(users.fields):
+        return
+    users.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile_page(sender, instance, update_fields=None, **kwargs):
+    """
+    Сбросить страницу профиля, если изменились её публичные поля.
+
+    Вместе с ней сбрасывается имя по id для тегов страниц постов.
+    """
+    if update_fields and not set(update_fields) & set(users.fields):
+        return
+    invalidate_tags(f'profile:{instance.username}')
+    cache.delete(USERNAME_KEY.format(instance.pk))
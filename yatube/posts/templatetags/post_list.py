@@ -0,0 +1,44 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import resize
+from posts.thumbnails import prefetch_post_thumbnails
+
+register = template.Library()
+
+POST_TEMPLATE = 'includes/post.html'
+
+
+@register.simple_tag(takes_context=True)
+def render_post_list(context, posts) -> list:
+    """
+    Отрендерить страницу постов за один проход без include в цикле.
+
+    Используется с присваиванием: {% render_post_list page_obj as posts %}.
+    Записи миниатюр всей страницы читаются заранее одним пакетом.
+    Шаблон поста загружается один раз на страницу; между запросами его
+    хранит кэширующий загрузчик production, а в разработке правки
+    шаблона видны без перезапуска.
+    """
+    post_template = context.template.engine.get_template(POST_TEMPLATE)
+    posts = list(posts)
+    prefetch_post_thumbnails(posts)
+    rendered = []
+    with context.push():
+        for post in posts:
+            context['post'] = post
+            rendered.append(mark_safe(post_template.render(context)))
+    return rendered
+
+
+@register.simple_tag
+def thumb_url(image, size: str, crop: str = 'crop') -> str:
+    """
+    Подписанный адрес миниатюры изображения из списка THUMB_SIZES.
+
+    Например: {% thumb_url post.image '480x170' 'fit' %}.
+    """
+    if not image:
+        return ''
+    width, height = map(int, size.split('x'))
+    return resize.thumb_url(image.name, width, height, crop)
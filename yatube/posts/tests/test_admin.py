@@ -0,0 +1,69 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.paginator import ApproximateCountPaginator
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = Post.objects.bulk_create([
+            Post(author=cls.admin, group=cls.group, text=f'Пост {number}')
+            for number in range(5)
+        ])
+        Comment.objects.create(
+            post=Post.objects.first(), author=cls.admin, text='Комментарий'
+        )
+        Follow.objects.create(
+            user=User.objects.create_user(username='reader'),
+            author=cls.admin,
+        )
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_changelists_available(self):
+        """Списки постов, комментариев и подписок открываются с поиском."""
+        for model in (Post, Comment, Follow):
+            with self.subTest(model=model.__name__):
+                url = reverse(
+                    f'admin:posts_{model._meta.model_name}_changelist'
+                )
+                response = self.admin_client.get(url, {'q': 'admin'})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_text_search_by_prefix(self):
+        """Текст постов ищется только по явному префиксу text:."""
+        url = reverse('admin:posts_post_changelist')
+        for query, count in (
+            ('Пост 1', 0), ('text:Пост 1', 1), ('adm', 0), ('admin', 5)
+        ):
+            with self.subTest(query=query):
+                response = self.admin_client.get(url, {'q': query})
+                self.assertEqual(
+                    response.context['cl'].result_count, count
+                )
+
+    def test_approximate_count(self):
+        """Для таблицы без фильтра число строк берётся из оценки."""
+        with mock.patch('core.paginator.ADMIN_COUNT_LIMIT', 2):
+            unfiltered = ApproximateCountPaginator(Post.objects.all(), 2)
+            filtered = ApproximateCountPaginator(
+                Post.objects.filter(group=self.group), 2
+            )
+            self.assertEqual(unfiltered.count, Post.objects.count())
+            self.assertEqual(filtered.count, 2)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class AjaxViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.follow_url = reverse('posts:profile_follow', args=['author'])
+        cls.unfollow_url = reverse('posts:profile_unfollow', args=['author'])
+        cls.comment_url = reverse('posts:add_comment', args=[cls.post.pk])
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_follow_is_idempotent(self):
+        """Повторная подписка не создаёт дубликат и не падает."""
+        for _ in range(2):
+            response = self.authorized_client.post(self.follow_url, **AJAX)
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['following'])
+        self.assertIn('Отписаться', response.json()['html'])
+        self.assertEqual(
+            Follow.objects.filter(user=self.user, author=self.author).count(),
+            1,
+        )
+
+    def test_unfollow(self):
+        """Отписка возвращает кнопку подписки."""
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.post(self.unfollow_url, **AJAX)
+        self.assertFalse(response.json()['following'])
+        self.assertIn('Подписаться', response.json()['html'])
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_without_js_redirects(self):
+        """Без AJAX подписка по-прежнему ведёт в профиль."""
+        response = self.authorized_client.get(self.follow_url)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=['author'])
+        )
+
+    def test_unique_constraint(self):
+        """База не допускает двух одинаковых подписок."""
+        Follow.objects.create(user=self.user, author=self.author)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.user, author=self.author)
+
+    def test_comment_fragment(self):
+        """AJAX-комментарий возвращает только свой HTML."""
+        response = self.authorized_client.post(
+            self.comment_url, {'text': 'Новый комментарий'}, **AJAX
+        )
+        comment = Comment.objects.get()
+        self.assertEqual(response.status_code, 201)
+        self.assertContains(
+            response, f'id="comment-{comment.pk}"', status_code=201
+        )
+        self.assertContains(response, 'Новый комментарий', status_code=201)
+        self.assertNotContains(response, '<html', status_code=201)
+
+    def test_comment_errors(self):
+        """Ошибки формы комментария приходят в JSON."""
+        response = self.authorized_client.post(
+            self.comment_url, {'text': ''}, **AJAX
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
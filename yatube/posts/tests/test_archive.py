@@ -0,0 +1,131 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cache import get_tag_versions
+from yatube.settings import POST_PER_PAGE
+
+from ..models import ArchivedComment, ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+OLD_POSTS = 7
+NEW_POSTS = 8
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+        old_date = timezone.now() - timedelta(days=100)
+        for number in range(OLD_POSTS):
+            post = Post.objects.create(
+                author=self.user,
+                text=f'Старый пост {number}',
+                group=self.group,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=old_date - timedelta(minutes=number)
+            )
+        self.old_post = post
+        Comment.objects.create(
+            post=self.old_post, author=self.user, text='Старый комментарий'
+        )
+        for number in range(NEW_POSTS):
+            Post.objects.create(
+                author=self.user,
+                text=f'Новый пост {number}',
+                group=self.group,
+            )
+        call_command(
+            'archive_posts', days=30, batch_size=3, pause=0, stdout=StringIO()
+        )
+
+    def test_old_posts_moved(self):
+        """Старые посты и их комментарии переносятся в архив."""
+        self.assertEqual(Post.objects.count(), NEW_POSTS)
+        self.assertEqual(ArchivedPost.objects.count(), OLD_POSTS)
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(
+            ArchivedComment.objects.filter(post_id=self.old_post.pk).exists()
+        )
+
+    def test_pages_invalidated(self):
+        """Перенос сбрасывает кэш страниц поста, автора и группы."""
+        post = Post.objects.create(
+            author=self.user, text='Ещё старый', group=self.group
+        )
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=100)
+        )
+        tags = (
+            f'post-body:{post.pk}', f'post-comments:{post.pk}',
+            f'profile:{self.user.username}', f'group:{self.group.slug}',
+        )
+        before = get_tag_versions(tags)
+        call_command('archive_posts', days=30, pause=0, stdout=StringIO())
+        after = get_tag_versions(tags)
+        for tag, old, new in zip(tags, before, after):
+            with self.subTest(tag=tag):
+                self.assertNotEqual(old, new)
+
+    def test_archived_post_detail(self):
+        """Страница поста находит его в архиве."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.old_post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, self.old_post.text)
+        self.assertContains(response, 'Старый комментарий')
+
+    def test_author_post_count_includes_archive(self):
+        """Страница поста считает посты автора вместе с архивом."""
+        for post_id in (self.old_post.pk, Post.objects.first().pk):
+            with self.subTest(post_id=post_id):
+                response = self.guest_client.get(
+                    reverse('posts:post_detail', args=[post_id])
+                )
+                self.assertEqual(
+                    response.context['author_posts'], OLD_POSTS + NEW_POSTS
+                )
+
+    def test_feeds_continue_into_archive(self):
+        """Дальние страницы лент продолжаются архивом."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first_page = self.guest_client.get(url).context['page_obj']
+                second_page = self.guest_client.get(
+                    url + '?page=2'
+                ).context['page_obj']
+                self.assertEqual(
+                    first_page.paginator.count, OLD_POSTS + NEW_POSTS
+                )
+                self.assertEqual(len(first_page), POST_PER_PAGE)
+                self.assertIsInstance(first_page[-1], ArchivedPost)
+                self.assertEqual(
+                    len(second_page), OLD_POSTS + NEW_POSTS - POST_PER_PAGE
+                )
+                self.assertTrue(all(
+                    isinstance(post, ArchivedPost) for post in second_page
+                ))
@@ -0,0 +1,197 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cache import CACHE_HEADER, page_cache_stats
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.group_list = reverse('posts:group_posts', args=[cls.group.slug])
+        cls.profile = reverse('posts:profile', args=[cls.user.username])
+        cls.post_detail = reverse('posts:post_detail', args=[cls.post.pk])
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_anonymous_pages_cached(self):
+        """Страницы для анонимов отдаются из кэша."""
+        for url in (self.group_list, self.profile, self.post_detail):
+            with self.subTest(url=url):
+                response_1 = self.guest_client.get(url)
+                Post.objects.filter(pk=self.post.pk).update(text='Другой')
+                response_2 = self.guest_client.get(url)
+                Post.objects.filter(pk=self.post.pk).update(
+                    text=self.post.text
+                )
+                self.assertEqual(response_1[CACHE_HEADER], 'miss')
+                self.assertEqual(response_2[CACHE_HEADER], 'hit')
+                self.assertEqual(response_1.content, response_2.content)
+
+    def test_authorized_user_gets_own_fragments(self):
+        """Скелет общий, а шапка и форма комментария свои у каждого."""
+        self.guest_client.get(self.post_detail)
+        response = self.authorized_client.get(self.post_detail)
+        self.assertEqual(response[CACHE_HEADER], 'hit')
+        self.assertContains(response, f'Пользователь: {self.user.username}')
+        self.assertContains(response, 'Добавить комментарий')
+        self.assertContains(response, 'редактировать запись')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        response = self.guest_client.get(self.post_detail)
+        self.assertEqual(response[CACHE_HEADER], 'hit')
+        self.assertNotContains(response, 'Пользователь:')
+        self.assertNotContains(response, 'Добавить комментарий')
+        self.assertNotContains(response, 'редактировать запись')
+
+    def test_follow_button_rendered_per_user(self):
+        """Кнопка подписки на закэшированной странице профиля своя."""
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=self.user)
+        follower_client = Client()
+        follower_client.force_login(follower)
+        self.guest_client.get(self.profile)
+        self.assertContains(follower_client.get(self.profile), 'Отписаться')
+        self.assertContains(self.guest_client.get(self.profile), 'Подписаться')
+
+    def test_follow_checked_once_on_miss(self):
+        """На промахе подписка проверяется только для кнопки подписки."""
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(self.profile)
+        follow_queries = [
+            query for query in queries.captured_queries
+            if 'posts_follow' in query['sql']
+            and 'posts_recommendation' not in query['sql']
+        ]
+        self.assertEqual(len(follow_queries), 1)
+
+    def test_page_number_in_key(self):
+        """Разные страницы пагинатора кэшируются отдельно."""
+        self.guest_client.get(self.group_list)
+        response = self.guest_client.get(self.group_list + '?page=2')
+        self.assertEqual(response[CACHE_HEADER], 'miss')
+
+    def test_new_comment_invalidates_post(self):
+        """Новый комментарий сбрасывает кэш страницы поста."""
+        self.guest_client.get(self.post_detail)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        response = self.guest_client.get(self.post_detail)
+        self.assertEqual(response[CACHE_HEADER], 'miss')
+        self.assertContains(response, 'Комментарий')
+
+    def test_comment_keeps_post_body_cached(self):
+        """Новый комментарий не рендерит заново текст поста."""
+        self.guest_client.get(self.post_detail)
+        Post.objects.filter(pk=self.post.pk).update(text='Другой текст')
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        response = self.guest_client.get(self.post_detail)
+        self.assertContains(response, 'Комментарий')
+        self.assertContains(response, self.post.text)
+
+    def test_post_edit_keeps_comments_cached(self):
+        """Правка поста сбрасывает его текст, но не комментарии."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        self.guest_client.get(self.post_detail)
+        Comment.objects.filter(pk=comment.pk).update(text='Другой')
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Новый текст', 'group': self.group.pk},
+        )
+        response = self.guest_client.get(self.post_detail)
+        self.assertEqual(response[CACHE_HEADER], 'miss')
+        self.assertContains(response, 'Новый текст')
+        self.assertContains(response, 'Комментарий')
+
+    def test_new_post_invalidates_author_and_group(self):
+        """Новый пост сбрасывает кэш страниц автора и группы."""
+        self.guest_client.get(self.group_list)
+        self.guest_client.get(self.profile)
+        Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group
+        )
+        for url in (self.group_list, self.profile):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response[CACHE_HEADER], 'miss')
+                self.assertContains(response, 'Новый пост')
+
+    def test_new_post_invalidates_author_post_count(self):
+        """Новый пост автора сбрасывает страницы его постов со счётчиком."""
+        self.guest_client.get(self.post_detail)
+        Post.objects.create(author=self.user, text='Ещё пост')
+        response = self.guest_client.get(self.post_detail)
+        self.assertEqual(response[CACHE_HEADER], 'miss')
+        self.assertEqual(
+            response.context['author_posts'],
+            Post.objects.filter(author=self.user).count(),
+        )
+
+    def test_renamed_author_tag(self):
+        """После переименования автора страница поста получает новый тег."""
+        user = User.objects.create_user(username='renamed')
+        post = Post.objects.create(author=user, text='Пост')
+        url = reverse('posts:post_detail', args=[post.pk])
+        self.guest_client.get(url)
+        user.username = 'renamed-again'
+        user.save()
+        self.guest_client.get(url)
+        Post.objects.create(author=user, text='Ещё пост')
+        response = self.guest_client.get(url)
+        self.assertEqual(response[CACHE_HEADER], 'miss')
+        self.assertEqual(response.context['author_posts'], 2)
+
+    def test_post_save_reads_only_username(self):
+        """Сигнал берёт имя автора без загрузки всей строки пользователя."""
+        post = Post.objects.get(pk=self.post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        user_queries = [
+            query['sql'] for query in queries if 'auth_user' in query['sql']
+        ]
+        self.assertEqual(len(user_queries), 1)
+        self.assertNotIn('password', user_queries[0])
+
+    def test_login_keeps_profile_cached(self):
+        """Обновление last_login при входе не сбрасывает профиль."""
+        self.guest_client.get(self.profile)
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        response = self.guest_client.get(self.profile)
+        self.assertEqual(response[CACHE_HEADER], 'hit')
+
+    def test_stats(self):
+        """Счётчики попаданий и промахов считаются по представлениям."""
+        self.guest_client.get(self.post_detail)
+        self.guest_client.get(self.post_detail)
+        self.assertEqual(
+            page_cache_stats()['post_detail'], {'hits': 1, 'misses': 1}
+        )
@@ -0,0 +1,79 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..utils import get_comment_threads
+
+User = get_user_model()
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.first = cls.comment('Первая ветка')
+        cls.reply = cls.comment('Ответ', parent=cls.first)
+        cls.second = cls.comment('Вторая ветка')
+        cls.nested = cls.comment('Ответ на ответ', parent=cls.reply)
+
+    @classmethod
+    def comment(cls, text, parent=None):
+        return Comment.objects.create(
+            post=cls.post, author=cls.user, text=text, parent=parent
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_path_and_depth(self):
+        """Путь ответа продолжает путь родителя."""
+        self.assertEqual(self.nested.depth, 2)
+        self.assertEqual(
+            self.nested.path,
+            f'{self.first.pk:010d}.{self.reply.pk:010d}.{self.nested.pk:010d}',
+        )
+
+    def test_threads_single_query(self):
+        """Страница веток с ответами и авторами читается одним запросом."""
+        with self.assertNumQueries(1):
+            comments, has_next = get_comment_threads(
+                self.post.comments.all(), page=1, per_page=1
+            )
+            authors = [comment.author.username for comment in comments]
+        self.assertEqual(comments, [self.first, self.reply, self.nested])
+        self.assertEqual(authors, ['auth'] * 3)
+        self.assertTrue(has_next)
+        comments, has_next = get_comment_threads(
+            self.post.comments.all(), page=2, per_page=1
+        )
+        self.assertEqual(comments, [self.second])
+        self.assertFalse(has_next)
+
+    def test_max_depth(self):
+        """Слишком глубокий ответ прикрепляется к допустимому предку."""
+        with mock.patch('posts.models.COMMENT_MAX_DEPTH', 1):
+            comment = self.comment('Глубокий ответ', parent=self.reply)
+        self.assertEqual(comment.parent, self.first)
+        self.assertEqual(comment.depth, 1)
+
+    def test_reply_view(self):
+        """Ответ на комментарий создаётся через форму ответа."""
+        url = reverse('posts:add_comment', args=(self.post.pk,))
+        response = self.authorized_client.get(url, {'parent': self.first.pk})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, 'posts/reply.html')
+        self.authorized_client.post(
+            url, {'text': 'Новый ответ', 'parent': self.first.pk}
+        )
+        self.assertTrue(
+            Comment.objects.filter(
+                text='Новый ответ', parent=self.first, depth=1
+            ).exists()
+        )
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Follow, Post
+
+User = get_user_model()
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CHECKPOINT = os.path.join(TEMP_DIR, 'checkpoint.json')
+
+
+class DigestCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(author=cls.author, text='Свежий пост')
+        Post.objects.create(author=cls.other, text='Чужой пост')
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{number}',
+                email=f'reader{number}@example.com',
+            )
+            for number in range(5)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def send(self, **options):
+        call_command(
+            'send_digests', checkpoint=CHECKPOINT, stdout=StringIO(),
+            **options
+        )
+
+    def setUp(self):
+        if os.path.exists(CHECKPOINT):
+            os.remove(CHECKPOINT)
+
+    def test_digest_content(self):
+        """Подписчик получает посты только своих авторов."""
+        self.send()
+        self.assertEqual(len(mail.outbox), len(self.readers))
+        body = mail.outbox[0].body
+        self.assertIn('Свежий пост', body)
+        self.assertNotIn('Чужой пост', body)
+        self.assertIn(f'/posts/{self.post.pk}/', body)
+
+    def test_queries_per_batch(self):
+        """На пачку три запроса: пользователи, подписки и посты."""
+        with self.assertNumQueries(3 * 3 + 1):
+            self.send(batch_size=2)
+
+    def test_checkpoint(self):
+        """Рассылка продолжается с сохранённого места и не повторяется."""
+        with open(CHECKPOINT, 'w') as file:
+            json.dump({
+                'period': 'daily',
+                'until': (timezone.now() + timedelta(minutes=1)).isoformat(),
+                'last_user_id': self.readers[2].pk,
+                'done': False,
+            }, file)
+        self.send()
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox],
+            [reader.email for reader in self.readers[3:]],
+        )
+        self.send()
+        self.assertEqual(len(mail.outbox), 2)
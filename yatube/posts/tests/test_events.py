@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import events
+from ..events import Hub, hub, publish, publish_post
+from ..models import Follow, Post
+
+User = get_user_model()
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(EVENTS_DB=f'{TEMP_DIR}/events.sqlite3')
+class EventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_hub_routes_by_author(self):
+        """Событие попадает только в подписки на его автора."""
+        events_hub = Hub()
+        subscription = events_hub.subscribe([self.author.pk])
+        other_subscription = events_hub.subscribe([self.other.pk])
+        publish(self.author.pk, {'id': 1})
+        events_hub.poll()
+        event_id, payload = subscription.get(timeout=1)
+        self.assertEqual(payload, '{"id": 1}')
+        self.assertIsNone(other_subscription.get(timeout=0))
+        subscription.close()
+        other_subscription.close()
+        self.assertFalse(events_hub.by_author)
+
+    def test_poll_reads_without_lock(self):
+        """Пока опрос читает базу, подписки не ждут блокировку."""
+        events_hub = Hub()
+        subscription = events_hub.subscribe([self.author.pk])
+        publish(self.author.pk, {'id': 1})
+        connection = events.get_connection()
+        locked = []
+
+        def execute(*args):
+            locked.append(events_hub.lock.locked())
+            return connection.execute(*args)
+
+        with mock.patch.object(
+            events, 'get_connection',
+            return_value=mock.Mock(execute=execute),
+        ):
+            events_hub.poll()
+        self.assertEqual(locked, [False])
+        self.assertIsNotNone(subscription.get(timeout=1))
+        subscription.close()
+
+    def test_queue_is_bounded(self):
+        """Переполненная очередь не растёт, а помечается сбросом."""
+        events_hub = Hub()
+        subscription = events_hub.subscribe([self.author.pk])
+        for number in range(subscription.queue.maxsize + 1):
+            publish(self.author.pk, {'id': number})
+        events_hub.poll()
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(
+            subscription.queue.qsize(), subscription.queue.maxsize
+        )
+        subscription.close()
+
+    def test_stream_replays_missed_posts(self):
+        """Поток отдаёт пропущенные посты с Last-Event-ID."""
+        hub.start()
+        last_event_id = hub.last_id
+        post = Post.objects.create(
+            author=self.author, text='Свежий пост'
+        )
+        publish_post(post)
+        hub.poll()
+        response = self.authorized_client.get(
+            reverse('posts:follow_events'),
+            HTTP_LAST_EVENT_ID=str(last_event_id),
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b'retry:'))
+        event = next(stream).decode()
+        self.assertIn('event: post', event)
+        self.assertIn('Свежий пост', event)
+        response.close()
+        self.assertFalse(hub.by_author)
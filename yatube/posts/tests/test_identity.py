@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from ..identity import groups, users, write_version
+from ..models import Group
+
+User = get_user_model()
+
+
+class IdentityCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', email='auth@example.com'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+
+    def test_cached_lookup(self):
+        """Повторный поиск группы и профиля не обращается к базе."""
+        groups.get('test_slug')
+        users.get('auth')
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.get('test_slug'), self.group)
+            self.assertEqual(users.get('auth').username, 'auth')
+
+    def test_private_fields_not_cached(self):
+        """В кэше профилей нет почты и пароля."""
+        users.get('auth')
+        row, _ = users.rows['auth']
+        self.assertNotIn(self.user.email, row)
+        self.assertNotIn(self.user.password, row)
+
+    def test_negative_caching(self):
+        """Несуществующий слаг запоминается до появления группы."""
+        self.assertIsNone(groups.get('missing'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(groups.get('missing'))
+        group = Group.objects.create(title='Новая', slug='missing')
+        self.assertEqual(groups.get('missing'), group)
+
+    def test_save_invalidates(self):
+        """Изменение группы сразу видно при следующем поиске."""
+        groups.get('test_slug')
+        self.group.title = 'Другое название'
+        self.group.save()
+        self.assertEqual(groups.get('test_slug').title, 'Другое название')
+
+    def test_other_process_version(self):
+        """Новая версия в общем файле сбрасывает кэш процесса."""
+        groups.get('test_slug')
+        Group.objects.filter(pk=self.group.pk).update(title='Из другого')
+        write_version(groups.version_path)
+        with mock.patch('posts.identity.IDENTITY_CACHE_CHECK_INTERVAL', 0):
+            self.assertEqual(groups.get('test_slug').title, 'Из другого')
+
+    def test_missing_expires(self):
+        """Отметка об отсутствии живёт IDENTITY_CACHE_MISSING_TTL секунд."""
+        with mock.patch('posts.identity.IDENTITY_CACHE_MISSING_TTL', 0):
+            self.assertIsNone(groups.get('created-elsewhere'))
+        Group.objects.bulk_create(
+            [Group(title='Без сигнала', slug='created-elsewhere')]
+        )
+        self.assertIsNotNone(groups.get('created-elsewhere'))
+
+    def test_login_keeps_cache(self):
+        """Обновление last_login при входе не сбрасывает профили."""
+        users.get('auth')
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            users.get('auth')
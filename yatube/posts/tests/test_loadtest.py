@@ -0,0 +1,96 @@
+from io import StringIO
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from ..management.commands.loadtest import (Command, Dataset, Stats, Worker,
+                                            parse_mix, percentile)
+from ..models import Post
+
+User = get_user_model()
+
+
+class LoadtestHelpersTests(SimpleTestCase):
+    def test_parse_mix(self):
+        """Смесь разбирается в веса по именам запросов."""
+        self.assertEqual(
+            parse_mix('index=3, profile=1,'), {'index': 3.0, 'profile': 1.0}
+        )
+
+    def test_parse_mix_errors(self):
+        for value in ('index', 'index=много', 'unknown=1'):
+            with self.subTest(value=value):
+                with self.assertRaises(CommandError):
+                    parse_mix(value)
+
+    def test_percentile(self):
+        values = [float(number) for number in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 51.0)
+        self.assertEqual(percentile(values, 0.99), 100.0)
+        self.assertEqual(percentile(values, 1.0), 100.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_report(self):
+        """Отчёт содержит частоту, перцентили и долю ошибок по адресам."""
+        out = StringIO()
+        Command(stdout=out).report('Итого', {
+            'index': [(0.1, True), (0.3, False)],
+        }, 2.0)
+        lines = out.getvalue().splitlines()
+        self.assertIn('Итого', lines[0])
+        self.assertIn('index:', lines[1])
+        self.assertIn('1.0 запр/с', lines[1])
+        self.assertIn('p50   300.0', lines[1])
+        self.assertIn('ошибок  50.0%', lines[1])
+
+    def make_worker(self):
+        worker = Worker(
+            'http://testserver/', 'seed1', 'password', None, {'index': 1},
+            Stats(), 0, 0, 0,
+        )
+        worker.session = mock.Mock(cookies={})
+        return worker
+
+    def test_failed_login(self):
+        """Форма входа, отрисованная заново с кодом 200, — это ошибка."""
+        worker = self.make_worker()
+        worker.session.request.return_value = mock.Mock(
+            status_code=200, is_redirect=False, headers={}
+        )
+        self.assertFalse(worker.login())
+        [(_, ok)] = worker.stats.total['login']
+        self.assertFalse(ok)
+
+    def test_login_form_error_recorded(self):
+        """Сетевая ошибка при входе учитывается, и пользователь выбывает."""
+        worker = self.make_worker()
+        worker.deadline = float('inf')
+        worker.session.request.side_effect = requests.ConnectionError
+        worker.run()
+        self.assertEqual(worker.session.request.call_count, 1)
+        [(_, ok)] = worker.stats.total['login_form']
+        self.assertFalse(ok)
+
+    def test_successful_login(self):
+        worker = self.make_worker()
+
+        def log_in(*args, **kwargs):
+            worker.session.cookies[settings.SESSION_COOKIE_NAME] = 'key'
+            return mock.Mock(status_code=302, is_redirect=True, headers={})
+
+        worker.session.request.side_effect = log_in
+        self.assertTrue(worker.login())
+
+
+class DatasetTests(TestCase):
+    def test_only_seed_users(self):
+        """Для входа берутся только пользователи из команды seed."""
+        author = User.objects.create_user(username='seed7')
+        User.objects.create_user(username='seedling')
+        User.objects.create_user(username='admin')
+        Post.objects.create(author=author, text='Пост')
+        self.assertEqual(Dataset().usernames, ['seed7'])
@@ -0,0 +1,95 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Post
+from ..utils import LATEST_POST_TIMEOUT, get_latest_post
+
+User = get_user_model()
+
+
+class NewPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+        cls.url = reverse('posts:new_posts')
+        cls.follow_url = reverse('posts:follow_new_posts')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_nothing_new_is_cheap(self):
+        """Ответ «ничего нового» не обращается к базе и кэшируется."""
+        self.guest_client.get(self.url, {'after': self.old_post.pk})
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                self.url, {'after': self.old_post.pk}
+            )
+        self.assertEqual(
+            response.json(),
+            {'latest': self.old_post.pk, 'count': 0, 'more': False},
+        )
+        self.assertIn('max-age=5', response['Cache-Control'])
+
+    def test_new_posts_returned(self):
+        """Новые посты приходят числом и готовым HTML."""
+        new_post = Post.objects.create(author=self.other, text='Новый пост')
+        response = self.guest_client.get(self.url, {'after': self.old_post.pk})
+        data = response.json()
+        self.assertEqual(data['latest'], new_post.pk)
+        self.assertEqual(data['count'], 1)
+        self.assertIn('Новый пост', data['html'])
+        self.assertNotIn('Старый', data['html'])
+        response = self.guest_client.get(
+            self.url, {'after': self.old_post.pk, 'count_only': 1}
+        )
+        self.assertNotIn('html', response.json())
+
+    def test_since_timestamp(self):
+        """Новые посты можно запросить по дате публикации."""
+        Post.objects.create(author=self.other, text='Новый пост')
+        since = self.old_post.pub_date - timedelta(seconds=1)
+        response = self.guest_client.get(
+            self.url, {'since': since.isoformat()}
+        )
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_follow_feed_filtered(self):
+        """Лента подписок сообщает только о постах своих авторов."""
+        Post.objects.create(author=self.other, text='Чужой пост')
+        response = self.authorized_client.get(
+            self.follow_url, {'after': self.old_post.pk}
+        )
+        self.assertEqual(response.json()['count'], 0)
+        Post.objects.create(author=self.author, text='Свой пост')
+        response = self.authorized_client.get(
+            self.follow_url, {'after': self.old_post.pk}
+        )
+        self.assertEqual(response.json()['count'], 1)
+        self.assertIn('Свой пост', response.json()['html'])
+
+    def test_bad_request(self):
+        """Без after и since запрос отклоняется."""
+        response = self.guest_client.get(self.url, {'after': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_latest_post_expires(self):
+        """Отметка последнего поста в кэше процесса живёт недолго."""
+        with mock.patch('posts.utils.cache.set') as cache_set:
+            get_latest_post()
+        self.assertEqual(cache_set.call_args[0][2], LATEST_POST_TIMEOUT)
+        with mock.patch('posts.signals.cache.set') as cache_set:
+            Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(cache_set.call_args[0][2], LATEST_POST_TIMEOUT)
@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Recommendation
+from ..recommendations import FollowGraph
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'fan', 'critic', 'x', 'y', 'z', 'w')
+        }
+        cls.users = users
+        for user, authors in (
+            ('reader', 'xy'),
+            ('fan', 'xyz'),
+            ('critic', 'yzw'),
+        ):
+            for author in authors:
+                Follow.objects.create(
+                    user=users[user], author=users[author]
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.users['reader'])
+
+    def test_graph_recommendations(self):
+        """Рекомендуются авторы подписчиков тех же авторов."""
+        graph = FollowGraph()
+        self.assertEqual(
+            graph.recommend(self.users['reader'].pk),
+            [self.users['z'].pk, self.users['w'].pk],
+        )
+
+    def test_command_and_pages(self):
+        """Рекомендации считаются командой и видны на страницах."""
+        call_command('recommend_authors', stdout=StringIO())
+        self.assertEqual(Recommendation.objects.count(), 3)
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=('x',)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Кого почитать')
+                self.assertContains(
+                    response, reverse('posts:profile', args=('z',))
+                )
+
+    def test_follow_marks_stale(self):
+        """Подписка отмечает рекомендации для пересчёта."""
+        call_command('recommend_authors', stdout=StringIO())
+        self.client.get(reverse('posts:profile_follow', args=('z',)))
+        recommendation = Recommendation.objects.get(user=self.users['reader'])
+        self.assertTrue(recommendation.stale)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertNotContains(
+            response, reverse('posts:profile', args=('z',)) + '"'
+        )
+        call_command('recommend_authors', stdout=StringIO())
+        recommendation.refresh_from_db()
+        self.assertFalse(recommendation.stale)
+        self.assertEqual(recommendation.author_ids, str(self.users['w'].pk))
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+from PIL import Image
+
+from .. import resize
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailEndpointTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        Image.new('RGB', (1200, 800), 'red').save(
+            os.path.join(TEMP_MEDIA_ROOT, 'posts', 'photo.jpg')
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        shutil.rmtree(
+            os.path.join(TEMP_MEDIA_ROOT, resize.THUMB_DIR),
+            ignore_errors=True,
+        )
+
+    def test_signed_url_creates_file(self):
+        """Подписанный адрес отдаёт миниатюру и сохраняет её на диск."""
+        url = resize.thumb_url('posts/photo.jpg', 480, 170)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        target = os.path.join(
+            TEMP_MEDIA_ROOT, resize.thumb_name('posts/photo.jpg', 480, 170,
+                                               'crop')
+        )
+        with Image.open(target) as image:
+            self.assertEqual(image.size, (480, 170))
+
+    def test_fit_keeps_proportions(self):
+        """Режим fit вписывает изображение без обрезки."""
+        self.client.get(resize.thumb_url('posts/photo.jpg', 150, 150, 'fit'))
+        target = os.path.join(
+            TEMP_MEDIA_ROOT, resize.thumb_name('posts/photo.jpg', 150, 150,
+                                               'fit')
+        )
+        with Image.open(target) as image:
+            self.assertEqual(image.size, (150, 100))
+
+    def test_existing_thumbnail_served_as_file(self):
+        """Готовая миниатюра отдаётся как обычный файл без подписи."""
+        self.client.get(resize.thumb_url('posts/photo.jpg', 480, 170))
+        with mock.patch.object(resize, 'resize') as resize_image:
+            response = self.client.get(
+                '/media/thumb/480x170/crop/posts/photo.jpg'
+            )
+        self.assertEqual(response.status_code, 200)
+        resize_image.assert_not_called()
+
+    def test_bad_signature_forbidden(self):
+        """Без верной подписи новая миниатюра не создаётся."""
+        response = self.client.get(
+            '/media/thumb/480x170/crop/posts/photo.jpg?s=wrong'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_size_not_allowed(self):
+        """Размер не из THUMB_SIZES не отдаётся даже с подписью."""
+        response = self.client.get(
+            resize.thumb_url('posts/photo.jpg', 481, 170)
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_source(self):
+        """Миниатюра несуществующего файла отвечает 404."""
+        response = self.client.get(
+            resize.thumb_url('posts/missing.jpg', 480, 170)
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_concurrent_requests_resize_once(self):
+        """Одновременные первые запросы уменьшают изображение один раз."""
+        original = resize.resize
+
+        def slow_resize(*args):
+            time.sleep(0.05)
+            original(*args)
+
+        results = []
+        with mock.patch.object(
+            resize, 'resize', side_effect=slow_resize
+        ) as resize_image:
+            threads = [
+                threading.Thread(target=lambda: results.append(
+                    resize.ensure_thumb('posts/photo.jpg', 960, 339, 'crop')
+                ))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(resize_image.call_count, 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertIsNotNone(results[0])
+        self.assertEqual(resize._locks, {})
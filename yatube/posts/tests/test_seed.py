@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.test import TestCase
+
+from ..management.commands.seed import row_values
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, **options):
+        call_command(
+            'seed', users=20, groups=3, posts=50, comments=80, follows=3,
+            stdout=StringIO(), **options
+        )
+
+    def test_seed_counts(self):
+        """Команда создаёт заданное число строк."""
+        self.seed()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 80)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+
+    def test_pub_date_spread(self):
+        """Даты публикаций растут вместе с номерами постов."""
+        self.seed()
+        dates = list(Post.objects.order_by('pk').values_list(
+            'pub_date', flat=True
+        ))
+        self.assertEqual(dates, sorted(dates))
+        self.assertGreater(dates[-1] - dates[0], dates[1] - dates[0])
+        self.assertTrue(self.client.login(
+            username=User.objects.first().username, password='yatube-seed'
+        ))
+
+    def test_row_values(self):
+        """Строка раскладывается по колонкам, пропуски — по умолчанию."""
+        defaults = {'id': None, 'text': '', 'depth': 0}
+        self.assertEqual(
+            row_values(defaults, {'depth': 2, 'id': 1}), (1, '', 2)
+        )
+        with self.assertRaises(CommandError):
+            row_values(defaults, {'id': 1, 'txt': 'опечатка'})
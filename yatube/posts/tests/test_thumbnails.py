@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+
+from ..models import Post
+from ..thumbnails import FEED_GEOMETRY, FEED_OPTIONS, prefetch_post_thumbnails
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPrefetchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {number}',
+                image=SimpleUploadedFile(
+                    name=f'thumb_{number}.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            )
+            for number in range(3)
+        ]
+        cls.urls = [
+            get_thumbnail(post.image, FEED_GEOMETRY, **FEED_OPTIONS).url
+            for post in cls.posts
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        default.kvstore.local.clear()
+
+    def test_prefetch_single_query(self):
+        """Записи миниатюр страницы читаются одним запросом."""
+        with self.assertNumQueries(1):
+            thumbnails = prefetch_post_thumbnails(self.posts)
+        self.assertEqual(
+            sorted(thumbnail.url for thumbnail in thumbnails.values()),
+            sorted(self.urls),
+        )
+
+    def test_thumbnail_tag_after_prefetch(self):
+        """После предзагрузки миниатюры не требуют запросов."""
+        prefetch_post_thumbnails(self.posts)
+        cache.clear()
+        with self.assertNumQueries(0):
+            urls = [
+                get_thumbnail(post.image, FEED_GEOMETRY, **FEED_OPTIONS).url
+                for post in self.posts
+            ]
+        self.assertEqual(urls, self.urls)
@@ -0,0 +1,171 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from ..models import Post
+from .. import uploads
+from ..uploads import ERROR_PIXELS, ERROR_TYPE, process_post_image
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadHandlerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, content, content_type='image/gif'):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    name='upload.gif',
+                    content=content,
+                    content_type=content_type,
+                ),
+            },
+        )
+
+    def test_valid_image_saved(self):
+        """Корректное изображение сохраняется в пост."""
+        self.upload(SMALL_GIF)
+        self.assertTrue(
+            Post.objects.filter(image='posts/upload.gif').exists()
+        )
+
+    def test_rejects_wrong_signature(self):
+        """Файл без сигнатуры изображения отклоняется с ошибкой формы."""
+        response = self.upload(b'<?php echo 1; ?>' * 10)
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image', ERROR_TYPE)
+
+    def test_rejects_wrong_content_type(self):
+        """Файл с типом не изображения отклоняется до записи на диск."""
+        response = self.upload(SMALL_GIF, content_type='text/plain')
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image', ERROR_TYPE)
+
+    def test_rejects_large_resolution(self):
+        """Разрешение проверяется по заголовку изображения."""
+        with mock.patch('posts.uploads.POST_IMAGE_MAX_PIXELS', 1):
+            response = self.upload(SMALL_GIF)
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image', ERROR_PIXELS)
+
+    def test_broken_image_removed(self):
+        """Фоновая обработка убирает изображение, которое не декодируется."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с битой картинкой',
+            image=SimpleUploadedFile(
+                name='broken.gif',
+                content=SMALL_GIF[:20],
+                content_type='image/gif',
+            ),
+        )
+        process_post_image(post.pk)
+        post.refresh_from_db()
+        self.assertFalse(post.image)
+
+    def test_placeholder_generated(self):
+        """Фоновая обработка сохраняет заглушку для ленты."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        process_post_image(post.pk)
+        post.refresh_from_db()
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=[self.user.username])
+        )
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="960"')
+        self.assertContains(response, 'height="339"')
+        self.assertContains(response, post.image_placeholder)
+
+
+BACKGROUND_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=BACKGROUND_MEDIA_ROOT, IMAGE_WORKERS=2)
+class BackgroundProcessingTests(TransactionTestCase):
+    """Обработка после коммита идёт в потоке пула со своим соединением."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(BACKGROUND_MEDIA_ROOT, ignore_errors=True)
+
+    def test_processed_in_executor(self):
+        user = User.objects.create_user(username='auth')
+        client = Client()
+        client.force_login(user)
+        futures = []
+        executor = uploads.get_executor()
+        submit = executor.submit
+        with mock.patch.object(
+            executor, 'submit',
+            side_effect=lambda *args: futures.append(submit(*args)),
+        ):
+            client.post(reverse('posts:post_create'), data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    name='thread.gif', content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            })
+        self.assertEqual(len(futures), 1)
+        futures[0].result(timeout=10)
+        post = Post.objects.get()
+        self.assertTrue(post.image_placeholder)
+
+    @override_settings(IMAGE_WORKERS=0)
+    def test_processed_inline_without_workers(self):
+        """При IMAGE_WORKERS = 0 изображение обрабатывается без пула."""
+        user = User.objects.create_user(username='auth')
+        client = Client()
+        client.force_login(user)
+        with mock.patch.object(uploads, 'get_executor') as get_executor:
+            client.post(reverse('posts:post_create'), data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    name='inline.gif', content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            })
+        get_executor.assert_not_called()
+        self.assertTrue(Post.objects.get().image_placeholder)
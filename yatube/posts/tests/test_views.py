@@ -6,7 +6,8 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.template import engines
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
 from yatube.settings import POST_PER_PAGE
@@ -338,3 +339,40 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(len(
                     response.context['page_obj']), SECOND_PAGE_POSTS
                 )
+
+
+class PostListTagTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='test_title',
+            description='test_description',
+            slug='test-slug'
+        )
+        for post_temp in range(POSTS):
+            Post.objects.create(
+                text=f'text{post_temp}', author=cls.author, group=cls.group
+            )
+
+    def test_render_post_list_matches_include_loop(self):
+        """Тег render_post_list выводит то же, что include в цикле."""
+        context = {
+            'page_obj': Post.objects.select_related('author', 'group'),
+            'request': RequestFactory().get('/'),
+        }
+        include_loop = engines['django'].from_string(
+            '{% for post in page_obj %}'
+            '{% include "includes/post.html" %}'
+            '{% if not forloop.last %}<hr>{% endif %}'
+            '{% endfor %}'
+        ).render(context)
+        post_list = engines['django'].from_string(
+            '{% load post_list %}'
+            '{% render_post_list page_obj as posts_html %}'
+            '{% for post_html in posts_html %}{{ post_html }}'
+            '{% if not forloop.last %}<hr>{% endif %}'
+            '{% endfor %}'
+        ).render(context)
+        self.assertEqual(post_list.split(), include_loop.split())
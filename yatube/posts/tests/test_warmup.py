@@ -0,0 +1,141 @@
+import os
+import subprocess
+import sys
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from core.cache import CACHE_HEADER
+
+from ..models import Group, Post
+from .. import warmup
+from ..warmup import LocalFetcher, warmup_host, warmup_urls
+
+User = get_user_model()
+
+
+class WarmupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.busy = User.objects.create_user(username='busy')
+        cls.quiet = User.objects.create_user(username='quiet')
+        cls.group = Group.objects.create(title='Группа', slug='busy-group')
+        Post.objects.create(author=cls.quiet, text='Пост')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.busy, text=f'Пост {number}', group=cls.group
+            )
+            for number in range(3)
+        ]
+
+    def test_urls_by_activity(self):
+        """В прогрев попадают самые активные группы, авторы и свежие посты."""
+        urls = warmup_urls(index_pages=2, groups=1, profiles=1, posts=2)
+        self.assertEqual(urls, [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_posts', args=['busy-group']),
+            reverse('posts:profile', args=['busy']),
+            reverse('posts:post_detail', args=[self.posts[2].pk]),
+            reverse('posts:post_detail', args=[self.posts[1].pk]),
+        ])
+
+
+class WarmupCommandTests(TransactionTestCase):
+    """Потоки пула работают со своими соединениями и видят только коммиты."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='busy')
+        self.group = Group.objects.create(title='Группа', slug='busy-group')
+        self.post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+
+    def test_command_fills_page_cache(self):
+        """После прогрева страницы отдаются из кэша."""
+        out = StringIO()
+        call_command('warm_cache', workers=2, stdout=out)
+        self.assertIn('[1/', out.getvalue())
+        for url in (
+            reverse('posts:group_posts', args=['busy-group']),
+            reverse('posts:profile', args=['busy']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(Client().get(url)[CACHE_HEADER], 'hit')
+
+
+class WarmupStartupTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_warmed_once_per_cache(self):
+        """Процессы с общим кэшем прогревают его только один раз."""
+        with mock.patch.object(warmup, 'warm', return_value=[]) as warm, \
+                mock.patch.object(warmup, 'warmup_urls', return_value=[]), \
+                mock.patch.object(warmup, 'thumbnail_tasks', return_value=[]):
+            for _ in range(2):
+                warmup.start_background_warmup().join()
+        warm.assert_called_once()
+
+    def test_started_on_first_request(self):
+        """Прогрев стартует при первом запросе процесса, а не при импорте."""
+        application = mock.Mock(return_value=[b''])
+        with mock.patch.object(warmup, 'start_background_warmup') as start:
+            wrapped = warmup.WarmupOnFirstRequest(application)
+            start.assert_not_called()
+            for _ in range(2):
+                wrapped({}, None)
+        start.assert_called_once()
+        self.assertEqual(application.call_count, 2)
+
+    @override_settings(ALLOWED_HOSTS=['yatube.example.com'])
+    def test_local_fetcher_without_test_client(self):
+        """Страница рендерится вызовом представления без тестового клиента."""
+        fetch = LocalFetcher()
+        self.assertEqual(fetch(reverse('about:author')), 200)
+        self.assertEqual(fetch('/missing/page/'), 404)
+
+
+class WarmupHostTests(SimpleTestCase):
+    @override_settings(ALLOWED_HOSTS=['.example.com', 'localhost'])
+    def test_host_from_allowed_hosts(self):
+        """Хост прогрева берётся из ALLOWED_HOSTS."""
+        self.assertEqual(warmup_host(), 'example.com')
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_any_host(self):
+        self.assertEqual(warmup_host(), 'localhost')
+
+    def test_production_profile(self):
+        """В production страницы прогреваются без DisallowedHost."""
+        result = subprocess.run(
+            [sys.executable, '-c', (
+                'import django\n'
+                'django.setup()\n'
+                'from posts.warmup import LocalFetcher\n'
+                'print(LocalFetcher()("/about/author/"))\n'
+            )],
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'yatube.settings',
+                'YATUBE_ENV': 'production',
+                'YATUBE_SECRET_KEY': 'test',
+                'YATUBE_ALLOWED_HOSTS': 'yatube.example.com',
+                'YATUBE_WARMUP': '0',
+            },
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '200')
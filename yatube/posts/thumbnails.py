@@ -0,0 +1,87 @@
+from base64 import b64encode
+from io import BytesIO
+from time import perf_counter
+
+from PIL import Image, ImageFilter, ImageOps
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend as BaseThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.metrics import registry
+
+# Должно совпадать с тегом {% thumbnail %} в includes/post.html.
+FEED_GEOMETRY = '960x339'
+FEED_OPTIONS = {'crop': 'center', 'upscale': True}
+# Заглушка повторяет пропорции миниатюры ленты в крошечном размере.
+PLACEHOLDER_SIZE = (28, 10)
+PLACEHOLDER_BLUR = 1
+PLACEHOLDER_QUALITY = 40
+
+
+class ThumbnailBackend(BaseThumbnailBackend):
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        start = perf_counter()
+        super()._create_thumbnail(
+            source_image, geometry_string, options, thumbnail
+        )
+        registry.observe(
+            'yatube_thumbnail_generation_seconds',
+            {'geometry': geometry_string},
+            perf_counter() - start,
+        )
+
+    def get_thumbnail_file(self, file_, geometry_string, **options):
+        """Вернуть ImageFile миниатюры, не обращаясь к хранилищу."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def prefetch_thumbnails(self, files, geometry_string, **options):
+        """
+        Прочитать записи миниатюр для всех файлов одним пакетом.
+
+        Найденные записи оседают в локальном кэше хранилища, поэтому
+        последующие {% thumbnail %} на странице не ходят в кэш и базу.
+        Недостающие миниатюры создаются как обычно, при рендере.
+        """
+        get_many = getattr(default.kvstore, 'get_many', None)
+        if get_many is None:
+            return {}
+        return get_many([
+            self.get_thumbnail_file(file_, geometry_string, **options)
+            for file_ in files if file_
+        ])
+
+
+def prefetch_post_thumbnails(posts) -> dict:
+    """Подготовить миниатюры ленты для страницы постов."""
+    return default.backend.prefetch_thumbnails(
+        [post.image for post in posts], FEED_GEOMETRY, **FEED_OPTIONS
+    )
+
+
+def make_placeholder(image) -> str:
+    """
+    Вернуть размытую крошечную копию изображения в виде data: URI.
+
+    Обрезка та же, что у миниатюры ленты, поэтому заглушка растягивается
+    фоном под картинку без сдвига. Весит несколько сотен байт и
+    вставляется в страницу без отдельного запроса.
+    """
+    small = ImageOps.fit(
+        image, PLACEHOLDER_SIZE, Image.BILINEAR
+    ).convert('RGB').filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR))
+    buffer = BytesIO()
+    small.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+    return 'data:image/jpeg;base64,' + b64encode(buffer.getvalue()).decode()
@@ -0,0 +1,176 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import (SkipFile,
+                                             TemporaryFileUploadHandler)
+from django.db import connection, transaction
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from yatube.settings import POST_IMAGE_MAX_PIXELS, POST_IMAGE_MAX_SIZE
+
+from .models import Post
+from .thumbnails import FEED_GEOMETRY, FEED_OPTIONS, make_placeholder
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+    (b'RIFF', 'WEBP'),
+)
+# Заголовок с размерами должен уместиться в столько байт начала файла.
+HEADER_LIMIT = 256 * 1024
+
+ERROR_TYPE = 'Загрузите изображение в формате JPEG, PNG, GIF или WebP.'
+ERROR_SIZE = 'Файл больше {} МБ.'.format(POST_IMAGE_MAX_SIZE // 1024 // 1024)
+ERROR_PIXELS = 'Слишком большое разрешение изображения.'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Потоковая загрузка изображений во временный файл.
+
+    Файл отклоняется, как только станет ясно, что он не подходит:
+    по размеру запроса, заявленному типу, сигнатуре, размеру данных
+    или по разрешению из заголовка. В памяти держится только очередной
+    блок и начало файла до разбора заголовка. Причины отказа
+    складываются в request.upload_errors для формы.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        self.request.upload_errors = {}
+        self.request_too_large = content_length > (
+            POST_IMAGE_MAX_SIZE + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        )
+
+    def new_file(self, field_name, file_name, content_type, content_length,
+                 charset=None, content_type_extra=None):
+        self.field_name = field_name
+        if self.request_too_large:
+            self.reject(ERROR_SIZE)
+        if not content_type.startswith('image/'):
+            self.reject(ERROR_TYPE)
+        super().new_file(field_name, file_name, content_type, content_length,
+                         charset, content_type_extra)
+        self.header = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > POST_IMAGE_MAX_SIZE:
+            self.reject(ERROR_SIZE)
+        if self.header is not None:
+            self.check_header(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.header is not None:
+            self.request.upload_errors[self.field_name] = ERROR_TYPE
+            self.file.close()
+            return None
+        return super().file_complete(file_size)
+
+    def check_header(self, raw_data):
+        """Дочитать заголовок изображения, не декодируя пиксели."""
+        self.header += raw_data[:HEADER_LIMIT - len(self.header)]
+        if not any(
+            self.header[:len(signature)] == signature[:len(self.header)]
+            for signature, _ in IMAGE_SIGNATURES
+        ):
+            self.reject(ERROR_TYPE)
+        try:
+            with Image.open(BytesIO(self.header)) as image:
+                width, height = image.size
+                image_format = image.format
+        except Image.DecompressionBombError:
+            self.reject(ERROR_PIXELS)
+        except (OSError, SyntaxError, ValueError):
+            if len(self.header) >= HEADER_LIMIT:
+                self.reject(ERROR_TYPE)
+            return
+        if image_format not in {name for _, name in IMAGE_SIGNATURES}:
+            self.reject(ERROR_TYPE)
+        if width * height > POST_IMAGE_MAX_PIXELS:
+            self.reject(ERROR_PIXELS)
+        self.header = None
+
+    def reject(self, message):
+        self.request.upload_errors[self.field_name] = message
+        raise SkipFile(message)
+
+
+def process_post_image(post_id: int) -> None:
+    """
+    Полностью декодировать изображение поста и подготовить миниатюру.
+
+    Заодно сохраняется размытая заглушка для ленты. Размеры картинки в
+    разметке задаёт геометрия миниатюры, так что исходные не нужны.
+    Битое изображение удаляется из поста.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    try:
+        with post.image.open('rb'), Image.open(post.image) as image:
+            image.load()
+            post.image_placeholder = make_placeholder(image)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        logger.warning('Битое изображение у поста %s', post_id)
+        post.image.delete()
+        return
+    get_thumbnail(post.image, FEED_GEOMETRY, **FEED_OPTIONS)
+    # Пост могли удалить, пока шла обработка.
+    Post.objects.filter(pk=post_id).update(
+        image_placeholder=post.image_placeholder
+    )
+
+
+def process_safely(post_id: int) -> None:
+    try:
+        process_post_image(post_id)
+    except Exception:
+        logger.exception('Ошибка обработки изображения поста %s', post_id)
+
+
+def process_in_background(post_id: int) -> None:
+    try:
+        process_safely(post_id)
+    finally:
+        connection.close()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Пул фоновой обработки на IMAGE_WORKERS потоков, один на процесс."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS
+            )
+        return _executor
+
+
+def submit_image_processing(post_id: int) -> None:
+    """
+    Отдать изображение в пул или, если IMAGE_WORKERS = 0, обработать сразу.
+
+    Без пула обработка идёт в потоке запроса: так работает
+    development-профиль, и тесты не делят базу с фоновыми потоками.
+    """
+    if not settings.IMAGE_WORKERS:
+        process_safely(post_id)
+        return
+    get_executor().submit(process_in_background, post_id)
+
+
+def schedule_image_processing(post) -> None:
+    """Обработать изображение поста после коммита транзакции."""
+    transaction.on_commit(lambda: submit_image_processing(post.pk))
@@ -6,6 +6,7 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('new/', views.new_posts, name='new_posts'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -17,6 +18,8 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/new/', views.follow_new_posts, name='follow_new_posts'),
+    path('follow/events/', views.follow_events, name='follow_events'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,6 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Max, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.http import Http404
 
-from yatube.settings import POST_PER_PAGE
+from yatube.settings import (COMMENT_THREADS_PER_PAGE, NEW_POSTS_MAX_AGE,
+                             PAGE_CACHE_TIMEOUT, POST_PER_PAGE)
+
+from .models import ArchivedPost, Post
+
+User = get_user_model()
+
+# Больше любого пути: цифры и точка идут в ASCII раньше тильды.
+PATH_MAX = '~'
+LATEST_POST_KEY = 'posts:latest'
+# Автор поста по его id и имя пользователя по id: второе сбрасывает
+# сигнал сохранения пользователя, поэтому переименование видно сразу.
+POST_AUTHOR_KEY = 'posts:author:{}'
+USERNAME_KEY = 'users:username:{}'
+# С LocMemCache сигнал обновляет отметку только в процессе автора поста,
+# остальные перечитывают её из базы не реже, чем клиенты и прокси
+# обновляют ответ «ничего нового».
+LATEST_POST_TIMEOUT = NEW_POSTS_MAX_AGE
+
+
+class ArchiveChain:
+    """
+    Лента из оперативной таблицы и архива.
+
+    Архив содержит только посты старше оперативных, поэтому при общей
+    сортировке по убыванию даты он просто продолжает ленту. Архив
+    запрашивается, только когда страница выходит за оперативную часть.
+    """
+    ordered = True
+
+    def __init__(self, posts, archived_posts):
+        self.posts = posts
+        self.archived_posts = archived_posts
+        self._hot_count = None
+
+    @property
+    def hot_count(self) -> int:
+        if self._hot_count is None:
+            self._hot_count = self.posts.count()
+        return self._hot_count
+
+    def count(self) -> int:
+        return self.hot_count + self.archived_posts.count()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        items = list(self.posts[start:stop]) if start < self.hot_count else []
+        if stop is None or stop > self.hot_count:
+            archive_start = max(start - self.hot_count, 0)
+            archive_stop = None if stop is None else stop - self.hot_count
+            items += list(self.archived_posts[archive_start:archive_stop])
+        return items
+
+
+def get_post_or_404(post_id):
+    """Найти пост в оперативной таблице, а затем в архиве."""
+    for model in (Post, ArchivedPost):
+        post = model.objects.select_related(
+            'author', 'group'
+        ).filter(pk=post_id).first()
+        if post is not None:
+            return post
+    raise Http404('Пост не найден')
+
+
+def get_post_author(post_id) -> str:
+    """
+    Вернуть имя автора поста или архивного поста, None если поста нет.
+
+    Нужно для тегов скелета страницы поста ещё до её рендера. Кэшируются
+    отдельно id автора поста и имя по id, чтобы после переименования
+    страница получила тег нового профиля.
+    """
+    key = POST_AUTHOR_KEY.format(post_id)
+    author_id = cache.get(key)
+    if author_id is None:
+        for model in (Post, ArchivedPost):
+            author_id = model.objects.filter(pk=post_id).values_list(
+                'author_id', flat=True
+            ).first()
+            if author_id is not None:
+                cache.set(key, author_id, PAGE_CACHE_TIMEOUT)
+                break
+        else:
+            return None
+    key = USERNAME_KEY.format(author_id)
+    username = cache.get(key)
+    if username is None:
+        username = User.objects.filter(pk=author_id).values_list(
+            'username', flat=True
+        ).first()
+        if username is not None:
+            cache.set(key, username, PAGE_CACHE_TIMEOUT)
+    return username
+
+
+def get_latest_post() -> tuple:
+    """
+    Вернуть id и дату публикации самого нового поста.
+
+    Значение держится в кэше LATEST_POST_TIMEOUT секунд и обновляется
+    сигналами, поэтому частый опрос ленты без новых постов почти не
+    обращается к базе.
+    """
+    latest = cache.get(LATEST_POST_KEY)
+    if latest is None:
+        aggregate = Post.objects.aggregate(Max('pk'), Max('pub_date'))
+        latest = aggregate['pk__max'] or 0, aggregate['pub_date__max']
+        cache.set(LATEST_POST_KEY, latest, LATEST_POST_TIMEOUT)
+    return latest
 
 
 def get_paginator(request, post_list):
@@ -8,3 +127,35 @@ def get_paginator(request, post_list):
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def get_comment_threads(comments, page: int = 1,
+                        per_page: int = COMMENT_THREADS_PER_PAGE):
+    """
+    Вернуть комментарии страницы веток и признак следующей страницы.
+
+    Одним запросом по индексу (post, path): границы страницы берутся
+    подзапросами из путей корневых комментариев. В выборку попадает
+    и первый корень следующей страницы, он лишь отмечает её наличие.
+    """
+    roots = comments.filter(depth=0).order_by('path').values('path')
+    offset = (page - 1) * per_page
+    start = Subquery(roots[offset:offset + 1])
+    end = Subquery(roots[offset + per_page:offset + per_page + 1])
+    threads = list(
+        comments.select_related('author').filter(
+            path__gte=start,
+            path__lte=Coalesce(end, Value(PATH_MAX)),
+        ).order_by('path')
+    )
+    has_next = sum(comment.depth == 0 for comment in threads) > per_page
+    if has_next:
+        threads.pop()
+    return threads, has_next
+
+
+def get_comments_page(request) -> int:
+    try:
+        return max(int(request.GET.get('comments', 1)), 1)
+    except ValueError:
+        return 1
@@ -1,77 +1,276 @@
-from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
 from django.db.models import CharField, IntegerField, SlugField
-from django.http import HttpRequest, HttpResponse
+from django.http import (Http404, HttpRequest, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
 
-from yatube.settings import TIME_CASH
+from core.cache import cache_page_skeleton, cached_fragment
+from core.views import serve_media
+from yatube.settings import (NEW_POSTS_LIMIT, NEW_POSTS_MAX_AGE,
+                             PAGE_CACHE_TIMEOUT, POST_PER_PAGE, TIME_CASH)
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
-from .utils import get_paginator
+from .events import event_stream, hub, publish_post
+from .forms import CommentForm, PostForm, ReplyForm
+from .identity import groups, users
+from .models import ArchivedPost, Follow, Post
+from .recommendations import get_recommended_authors, mark_stale
+from .resize import (check_signature, ensure_thumb, is_allowed, thumb_exists,
+                     thumb_name)
+from .uploads import schedule_image_processing
+from .utils import (ArchiveChain, get_comment_threads, get_comments_page,
+                    get_latest_post, get_paginator, get_post_author,
+                    get_post_or_404)
 
-User = get_user_model()
 
+def profile_fragments(request: HttpRequest, username: CharField) -> dict:
+    """Вернуть персональный контекст страницы профиля."""
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user,
+        author__username=username
+    ).exists()
+    return {
+        'following': following,
+        'recommended': get_recommended_authors(request.user),
+    }
+
+
+def post_detail_tags(request: HttpRequest, post_id: IntegerField) -> tuple:
+    """
+    Теги страницы поста.
+
+    Профиль автора входит в них, потому что на странице выводится
+    число его постов.
+    """
+    author = get_post_author(post_id)
+    return (
+        'groups', f'post-body:{post_id}', f'post-comments:{post_id}',
+        *((f'profile:{author}',) if author else ()),
+    )
 
-@cache_page(TIME_CASH, key_prefix="index_page")
+
+def post_detail_fragments(request: HttpRequest, post_id: IntegerField) -> dict:
+    """Вернуть персональный контекст страницы поста."""
+    return {'form': CommentForm()}
+
+
+@cache_page_skeleton(TIME_CASH)
 def index(request: HttpRequest) -> HttpResponse:
     """Вернуть HttpResponse объекта главной страницы."""
-    posts = Post.objects.select_related("group", "author")
+    posts = ArchiveChain(
+        Post.objects.select_related("group", "author"),
+        ArchivedPost.objects.select_related("group", "author"),
+    )
     page_obj = get_paginator(request, posts)
     return render(request, "posts/index.html", {'page_obj': page_obj})
 
 
+@cache_page_skeleton(
+    PAGE_CACHE_TIMEOUT,
+    tags=lambda request, slug: ('groups', f'group:{slug}'),
+)
 def group_posts(request: HttpRequest, slug: SlugField) -> HttpResponse:
     """Вернуть HttpResponse объекта страницы группы."""
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related("group", "author")
+    group = groups.get_or_404(slug)
+    posts = ArchiveChain(
+        group.posts.select_related("group", "author"),
+        group.archived_posts.select_related("group", "author"),
+    )
     page_obj = get_paginator(request, posts)
     context = {"group": group, "page_obj": page_obj}
     return render(request, "posts/group_list.html", context)
 
 
+@cache_page_skeleton(
+    PAGE_CACHE_TIMEOUT,
+    tags=lambda request, username: ('groups', f'profile:{username}'),
+    fragments=profile_fragments,
+)
 def profile(request: HttpRequest, username: CharField) -> HttpResponse:
     """Вернуть HttpResponse объекта страницы профиля."""
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related("author")
+    author = users.get_or_404(username)
+    posts = ArchiveChain(
+        author.posts.select_related("group", "author"),
+        author.archived_posts.select_related("group", "author"),
+    )
     page_obj = get_paginator(request, posts)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists()
-    context = {
-        "author": author,
-        "page_obj": page_obj,
-        'following': following,
-    }
+    # Подписка считается в profile_fragments: кнопка — дырка скелета.
+    context = {"author": author, "page_obj": page_obj}
     return render(request, 'posts/profile.html', context)
 
 
+@cache_page_skeleton(
+    PAGE_CACHE_TIMEOUT,
+    tags=post_detail_tags,
+    fragments=post_detail_fragments,
+)
 def post_detail(request: HttpRequest, post_id: IntegerField) -> HttpResponse:
-    """Вернуть HttpResponse объекта страницы деталей поста."""
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
-    form = CommentForm()
+    """
+    Вернуть HttpResponse объекта страницы деталей поста.
+
+    Текст поста и комментарии кэшируются отдельными фрагментами:
+    новый комментарий не заставляет заново рендерить пост, а правка
+    поста — ветки комментариев.
+    """
+    post = get_post_or_404(post_id)
+    archived = isinstance(post, ArchivedPost)
+    comments_page = get_comments_page(request)
     context = {
         "post": post,
-        "comments": comments,
-        "form": form,
+        "archived": archived,
+        "comments_page": comments_page,
+        "form": CommentForm(),
     }
+
+    def render_body():
+        return render_to_string(
+            'includes/post_body.html',
+            {**context, 'author_posts': ArchiveChain(
+                post.author.posts, post.author.archived_posts
+            ).count()},
+            request,
+        )
+
+    def render_comments():
+        comments, has_next_comments = get_comment_threads(
+            post.comments.all(), comments_page
+        )
+        return render_to_string(
+            'includes/comments.html',
+            {
+                **context,
+                'comments': comments,
+                'has_next_comments': has_next_comments,
+            },
+            request,
+        )
+
+    context['body'] = cached_fragment(
+        request, 'post_body',
+        ('groups', f'post-body:{post.pk}', f'profile:{post.author.username}'),
+        PAGE_CACHE_TIMEOUT, render_body, vary=(post.pk, archived),
+    )
+    context['comments'] = cached_fragment(
+        request, 'post_comments', (f'post-comments:{post.pk}',),
+        PAGE_CACHE_TIMEOUT, render_comments,
+        vary=(post.pk, archived, comments_page),
+    )
     return render(request, 'posts/post_detail.html', context)
 
 
+def new_posts_response(request: HttpRequest, posts) -> JsonResponse:
+    """
+    Вернуть посты ленты новее, чем есть у клиента.
+
+    Клиент передаёт id самого нового поста в after или дату в since.
+    Сначала они сравниваются с закэшированным самым свежим постом:
+    ответ «ничего нового» не обращается к базе и кэшируется клиентом.
+    Иначе считаются новые посты диапазоном по индексу, не больше
+    NEW_POSTS_LIMIT, и рендерится HTML первых из них для вставки
+    в начало ленты, если не передан count_only.
+    """
+    latest_id, latest_date = get_latest_post()
+    after = request.GET.get('after', '')
+    try:
+        since = parse_datetime(request.GET.get('since', ''))
+    except ValueError:
+        since = None
+    if after.isdigit():
+        has_new = int(after) < latest_id
+        posts = posts.filter(pk__gt=after)
+    elif since is not None:
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        has_new = latest_date is not None and since < latest_date
+        posts = posts.filter(pub_date__gt=since)
+    else:
+        return JsonResponse(
+            {'error': 'Укажите id поста в after или дату в since.'},
+            status=400,
+        )
+    data = {'latest': latest_id, 'count': 0, 'more': False}
+    if has_new:
+        ids = list(
+            posts.order_by('-pk').values_list('pk', flat=True)[
+                :NEW_POSTS_LIMIT + 1
+            ]
+        )
+        data['count'] = min(len(ids), NEW_POSTS_LIMIT)
+        data['more'] = len(ids) > NEW_POSTS_LIMIT
+        if ids and 'count_only' not in request.GET:
+            new_posts = Post.objects.select_related(
+                'group', 'author'
+            ).filter(pk__in=ids[:POST_PER_PAGE]).order_by('-pk')
+            data['html'] = render_to_string(
+                'posts/new_posts.html', {'posts': new_posts}, request
+            )
+    response = JsonResponse(data)
+    if not data['count']:
+        patch_cache_control(response, max_age=NEW_POSTS_MAX_AGE)
+    return response
+
+
+def new_posts(request: HttpRequest) -> HttpResponse:
+    """Вернуть JSON с новыми постами главной страницы."""
+    return new_posts_response(request, Post.objects.all())
+
+
+@login_required
+def follow_new_posts(request: HttpRequest) -> HttpResponse:
+    """Вернуть JSON с новыми постами ленты подписок."""
+    response = new_posts_response(
+        request,
+        Post.objects.filter(author__following__user=request.user),
+    )
+    patch_cache_control(response, private=True)
+    return response
+
+
+@login_required
+def follow_events(request: HttpRequest) -> HttpResponse:
+    """
+    Вернуть поток Server-Sent Events о новых постах авторов из подписок.
+
+    Подписки читаются при подключении, изменения вступают в силу при
+    переподключении. Под WSGI каждое открытое подключение занимает
+    поток сервера, поэтому потоки ограничены EVENTS_STREAM_TIMEOUT.
+    """
+    author_ids = Follow.objects.filter(user=request.user).values_list(
+        'author_id', flat=True
+    )
+    last_event_id = request.META.get('HTTP_LAST_EVENT_ID', '')
+    subscription = hub.subscribe(
+        author_ids,
+        int(last_event_id) if last_event_id.isdigit() else None,
+    )
+    response = StreamingHttpResponse(
+        event_stream(subscription), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def post_create(request: HttpRequest) -> HttpResponse:
     """Вернуть HttpResponse объекта страницы создания поста."""
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image:
+            schedule_image_processing(post)
+        transaction.on_commit(lambda: publish_post(post))
         return redirect('posts:profile', username=request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -84,11 +283,14 @@ def post_edit(request: HttpRequest, post_id: IntegerField) -> HttpResponse:
         request.POST or None,
         files=request.FILES or None,
         instance=post,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
     if post.author != request.user:
         return redirect("posts:post_detail", post_id)
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data and post.image:
+            schedule_image_processing(post)
         return redirect("posts:post_detail", post.pk)
     is_edit = True
     context = {
@@ -105,37 +307,93 @@ def post_edit(request: HttpRequest, post_id: IntegerField) -> HttpResponse:
 
 @login_required
 def add_comment(request: HttpRequest, post_id: IntegerField) -> HttpResponse:
-    """Вернуть HttpResponse объекта добавления комментария."""
-    post = get_object_or_404(Post, pk=post_id)
-    form = CommentForm(request.POST or None)
+    """
+    Вернуть HttpResponse объекта добавления комментария.
+
+    На AJAX-запрос вместо перехода к посту возвращается HTML нового
+    комментария или ошибки формы в JSON.
+    """
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    form = ReplyForm(
+        request.POST or None,
+        initial={'parent': request.GET.get('parent')},
+    )
+    form.fields['parent'].queryset = post.comments.all()
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        if request.is_ajax():
+            return render(
+                request,
+                'includes/comment.html',
+                {'comment': comment, 'post': post},
+                status=201,
+            )
+    elif request.is_ajax():
+        return JsonResponse({'errors': form.errors}, status=400)
+    elif request.method == 'GET' and request.GET.get('parent', '').isdigit():
+        parent = get_object_or_404(
+            post.comments.select_related('author'),
+            pk=request.GET['parent'],
+        )
+        return render(
+            request,
+            'posts/reply.html',
+            {'form': form, 'post_id': post_id, 'parent': parent},
+        )
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request: HttpRequest) -> HttpResponse:
     """Вернуть HttpResponse объекта страницы подписок."""
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = ArchiveChain(
+        Post.objects.select_related("group", "author").filter(
+            author__following__user=request.user
+        ),
+        ArchivedPost.objects.select_related("group", "author").filter(
+            author__following__user=request.user
+        ),
+    )
     page_obj = get_paginator(request, posts)
     context = {
-        "page_obj": page_obj
+        "page_obj": page_obj,
+        "recommended": get_recommended_authors(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
+def follow_response(request: HttpRequest, author,
+                    following: bool) -> HttpResponse:
+    """Вернуть новую кнопку подписки для AJAX или перейти в профиль."""
+    if request.is_ajax():
+        html = render_to_string(
+            'includes/follow_link.html',
+            {'following': following, 'username': author.username},
+            request,
+        )
+        return JsonResponse({'following': following, 'html': html})
+    return redirect('posts:profile', author.username)
+
+
 @login_required
 def profile_follow(request: HttpRequest, username: CharField) -> HttpResponse:
-    """Вернуть HttpResponse объекта подписки на автора."""
-    author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(
-            user=request.user, author=author
-        )
-    return redirect('posts:profile', username)
+    """
+    Вернуть HttpResponse объекта подписки на автора.
+
+    Подписка добавляется одним INSERT с пропуском дубликата по
+    ограничению уникальности, поэтому повторный запрос ничего не ломает.
+    """
+    author = users.get_or_404(username)
+    if request.user == author:
+        return follow_response(request, author, following=False)
+    Follow.objects.bulk_create(
+        [Follow(user=request.user, author=author)], ignore_conflicts=True
+    )
+    mark_stale(request.user)
+    return follow_response(request, author, following=True)
 
 
 @login_required
@@ -144,6 +402,28 @@ def profile_unfollow(
     username: CharField
 ) -> HttpResponse:
     """Вернуть HttpResponse объекта отмены подписки на автора."""
-    author = get_object_or_404(User, username=username)
+    author = users.get_or_404(username)
     Follow.objects.filter(user=request.user, author=author).delete()
-    return redirect('posts:profile', username=author.username)
+    mark_stale(request.user)
+    return follow_response(request, author, following=False)
+
+
+def thumbnail(request: HttpRequest, width: str, height: str, crop: str,
+              path: str) -> HttpResponse:
+    """
+    Отдать миниатюру файла, уменьшив его при первом запросе.
+
+    Новую миниатюру можно запросить только разрешённого размера и по
+    подписанному адресу. Готовая лежит на диске по пути из адреса, и
+    дальше её отдаёт serve_media или прокси как обычный файл.
+    """
+    width, height = int(width), int(height)
+    if not is_allowed(width, height, crop):
+        raise Http404
+    name = thumb_name(path, width, height, crop)
+    if not thumb_exists(name):
+        if not check_signature(name, request.GET.get('s', '')):
+            raise PermissionDenied
+        if ensure_thumb(path, width, height, crop) is None:
+            raise Http404
+    return serve_media(request, name)
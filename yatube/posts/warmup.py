@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connections
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from sorl.thumbnail import get_thumbnail
+
+from yatube.settings import (PAGE_CACHE_TIMEOUT, WARMUP_GROUPS,
+                             WARMUP_INDEX_PAGES, WARMUP_POSTS,
+                             WARMUP_PROFILES, WARMUP_SAMPLE, WARMUP_WORKERS)
+
+from .models import Post
+from .thumbnails import FEED_GEOMETRY, FEED_OPTIONS
+
+logger = logging.getLogger(__name__)
+
+# Отметка в общем кэше: прогрев уже запущен одним из процессов.
+WARMUP_KEY = 'warmup:started'
+
+
+def warmup_urls(index_pages=WARMUP_INDEX_PAGES, groups=WARMUP_GROUPS,
+                profiles=WARMUP_PROFILES, posts=WARMUP_POSTS) -> list:
+    """
+    Вернуть адреса для прогрева, начиная с самых посещаемых.
+
+    Самые активные группы и авторы определяются по последним
+    WARMUP_SAMPLE постам: это один запрос по первичному ключу.
+    """
+    recent = list(
+        Post.objects.order_by('-pk').values_list(
+            'pk', 'group__slug', 'author__username'
+        )[:WARMUP_SAMPLE]
+    )
+    index = reverse('posts:index')
+    urls = [index] + [
+        f'{index}?page={page}' for page in range(2, index_pages + 1)
+    ]
+    group_counts = Counter(slug for _, slug, _ in recent if slug)
+    urls += [
+        reverse('posts:group_posts', args=[slug])
+        for slug, _ in group_counts.most_common(groups)
+    ]
+    author_counts = Counter(username for _, _, username in recent)
+    urls += [
+        reverse('posts:profile', args=[username])
+        for username, _ in author_counts.most_common(profiles)
+    ]
+    urls += [
+        reverse('posts:post_detail', args=[pk]) for pk, _, _ in recent[:posts]
+    ]
+    return urls
+
+
+def make_thumbnail(image) -> int:
+    """Создать миниатюру ленты; 200 — как у успешно прогретой страницы."""
+    get_thumbnail(image, FEED_GEOMETRY, **FEED_OPTIONS)
+    return 200
+
+
+def thumbnail_tasks(posts=WARMUP_POSTS) -> list:
+    """Вернуть задачи создания миниатюр ленты для последних постов."""
+    images = Post.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).only('pk', 'image').order_by('-pk')[:posts]
+    return [
+        (
+            f'thumbnail:{post.pk}',
+            lambda image=post.image: make_thumbnail(image),
+        )
+        for post in images
+    ]
+
+
+def page_tasks(urls, fetch) -> list:
+    return [(url, lambda url=url: fetch(url)) for url in urls]
+
+
+def warmup_host() -> str:
+    """
+    Вернуть имя хоста, которое пройдёт проверку ALLOWED_HOSTS.
+
+    Берётся первый разрешённый хост: '.example.com' разрешает и сам
+    example.com, а для '*' и пустого списка подходит localhost.
+    """
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+        break
+    return 'localhost'
+
+
+class LocalFetcher:
+    """
+    Рендерить страницы в этом процессе, вызывая представление напрямую.
+
+    Запрос собирается RequestFactory от имени анонимного читателя и
+    передаётся представлению по resolve(), минуя middleware: кэш
+    страниц заполняют декораторы представлений. Хост берётся из
+    ALLOWED_HOSTS, а не testserver, который есть только в разработке.
+    """
+
+    def __init__(self, host: str = None):
+        host = host or warmup_host()
+        self.factory = RequestFactory(HTTP_HOST=host, SERVER_NAME=host)
+
+    def __call__(self, url: str) -> int:
+        request = self.factory.get(url)
+        request.user = AnonymousUser()
+        try:
+            match = request.resolver_match = resolve(request.path_info)
+            response = match.func(request, *match.args, **match.kwargs)
+        except Http404:
+            return 404
+        if hasattr(response, 'render'):
+            response.render()
+        return response.status_code
+
+
+class HttpFetcher:
+    """Запрашивать страницы у запущенного сервера по HTTP."""
+
+    def __init__(self, base_url: str, timeout: float = 30):
+        import requests
+        self.requests = requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def __call__(self, url: str) -> int:
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = self.requests.Session()
+        return session.get(
+            self.base_url + url, timeout=self.timeout
+        ).status_code
+
+
+def run_task(task):
+    start = time.perf_counter()
+    try:
+        status = task()
+    except Exception as error:
+        status = repr(error)
+    finally:
+        connections.close_all()
+    return status, time.perf_counter() - start
+
+
+def warm(tasks, workers: int = WARMUP_WORKERS, progress=None) -> list:
+    """
+    Выполнить задачи (имя, функция) пулом из workers потоков.
+
+    После каждой задачи вызывается progress(done, total, name, status,
+    elapsed). Возвращает список (имя, статус, время).
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_task, task): name for name, task in tasks
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            status, elapsed = future.result()
+            results.append((futures[future], status, elapsed))
+            if progress is not None:
+                progress(done, len(futures), futures[future], status, elapsed)
+    return results
+
+
+def start_background_warmup() -> threading.Thread:
+    """
+    Прогреть кэш в фоне, не задерживая приём запросов.
+
+    Кэш в production общий, поэтому прогревает только процесс, первым
+    поставивший WARMUP_KEY; остальные выходят сразу. Через
+    PAGE_CACHE_TIMEOUT страницы всё равно устаревают, и тогда прогреть
+    их может следующий запущенный процесс.
+    """
+    def run():
+        try:
+            if not cache.add(WARMUP_KEY, os.getpid(), PAGE_CACHE_TIMEOUT):
+                return
+            start = time.perf_counter()
+            results = warm(
+                thumbnail_tasks() + page_tasks(warmup_urls(), LocalFetcher())
+            )
+        except Exception:
+            logger.exception('Прогрев кэша не удался')
+            return
+        finally:
+            connections.close_all()
+        logger.info(
+            'Кэш прогрет: %s адресов за %.1f с',
+            len(results), time.perf_counter() - start,
+        )
+
+    thread = threading.Thread(target=run, name='cache-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+class WarmupOnFirstRequest:
+    """
+    WSGI-обёртка, запускающая прогрев при первом запросе процесса.
+
+    Сервер с предзагрузкой импортирует yatube.wsgi до fork, и поток,
+    запущенный при импорте, в рабочие процессы не попадает. Поэтому
+    поток стартует уже в рабочем процессе, при первом запросе.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.pid = os.getpid()
+                    start_background_warmup()
+        return self.application(environ, start_response)
@@ -1,21 +1,156 @@
 import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = 'be@6zamzvnyjelx#-p!$*-8(qzefr8w6h^f&-0az4qf5wz!@%&'
 
+# Профиль настроек: development или production. Выбирается переменной
+# окружения YATUBE_ENV, значения production задаются в конце файла.
+ENVIRONMENT = os.environ.get('YATUBE_ENV', 'development')
+
 DEBUG = True
 
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Префикс внутреннего location фронтового прокси, например
+# '/protected-media/'. Если задан, файлы отдаёт прокси по X-Accel-Redirect.
+MEDIA_ACCEL_REDIRECT = None
+
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 30
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 POST_PER_PAGE = 10
 
 TIME_CASH = 20
 
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Сколько новых постов сообщает опрос ленты и сколько секунд клиенты
+# и прокси могут кэшировать ответ «ничего нового».
+NEW_POSTS_LIMIT = 100
+
+NEW_POSTS_MAX_AGE = 5
+
+# Групп и профилей в LRU-кэше каждого процесса и как часто, в секундах,
+# сверять его версию с файлом версии, общим для всех процессов.
+IDENTITY_CACHE_SIZE = 1000
+
+IDENTITY_CACHE_CHECK_INTERVAL = 1
+
+IDENTITY_VERSION_DIR = os.path.join(
+    tempfile.gettempdir(), 'yatube-identity'
+)
+
+# Сколько секунд строка и отметка об отсутствии живут в кэше процесса,
+# даже если версия не менялась.
+IDENTITY_CACHE_TTL = 300
+
+IDENTITY_CACHE_MISSING_TTL = 5
+
+# Больше этого числа строк админка не пересчитывает точно.
+ADMIN_COUNT_LIMIT = 10000
+
+COMMENT_THREADS_PER_PAGE = 20
+
+COMMENT_MAX_DEPTH = 8
+
+# Сколько рекомендованных авторов хранить и сколько показывать.
+RECOMMENDATIONS_STORED = 20
+
+RECOMMENDATIONS_SHOWN = 5
+
+# Подписчиков автора, по которым считаются его соседи по подпискам.
+RECOMMENDATIONS_FOLLOWERS_SAMPLE = 1000
+
+ARCHIVE_AFTER_DAYS = 90
+
+ARCHIVE_BATCH_SIZE = 500
+
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+
+PROFILER_QUERY_PARAM = '_profile'
+
+PROFILER_SAMPLE_RATE = 0.0
+
+PROFILER_MAX_REPORTS = 200
+
+# Общий каталог, через который процессы складывают метрики для /metrics.
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+
+METRICS_FLUSH_INTERVAL = 5
+
+# Токен для /metrics в заголовке Authorization: Bearer <токен>. Без него
+# эндпоинт выключен: за прокси адрес клиента всегда локальный.
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN')
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+
+THUMBNAIL_LOCAL_CACHE_SIZE = 10000
+
+FILE_UPLOAD_HANDLERS = ['posts.uploads.ImageUploadHandler']
+
+POST_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+
+# Потоков для фоновой обработки загруженных изображений. При 0
+# изображение обрабатывается в потоке запроса сразу после коммита.
+IMAGE_WORKERS = 0
+
+# Размеры, которые можно запросить по подписанному адресу
+# /media/thumb/<ширина>x<высота>/<crop|fit>/<путь>.
+THUMB_SIZES = ('960x339', '480x170', '150x150')
+
+THUMB_QUALITY = 85
+
+# Файлов блокировки, между которыми распределяются ключи миниатюр при
+# генерации из нескольких процессов.
+THUMB_LOCK_STRIPES = 64
+
+# Прогрев кэша после деплоя: страниц главной, самых активных групп и
+# авторов и последних постов. Активность считается по WARMUP_SAMPLE
+# последним постам.
+WARMUP_INDEX_PAGES = 5
+
+WARMUP_GROUPS = 20
+
+WARMUP_PROFILES = 20
+
+WARMUP_POSTS = 50
+
+WARMUP_SAMPLE = 1000
+
+WARMUP_WORKERS = 4
+
+# Прогревать кэш при первом запросе после запуска WSGI. Прогрев
+# запускает один процесс из всех, что делят кэш.
+WARMUP_ON_STARTUP = False
+
+# База SQLite, через которую процессы обмениваются событиями о новых
+# постах для потоков /follow/events/.
+EVENTS_DB = os.path.join(tempfile.gettempdir(), 'yatube-events.sqlite3')
+
+EVENTS_POLL_INTERVAL = 1
+
+# Событий в очереди одного подключения; при переполнении клиент
+# получает reset и перечитывает ленту сам.
+EVENTS_QUEUE_SIZE = 100
+
+EVENTS_HEARTBEAT = 15
+
+# Через сколько секунд поток закрывается и браузер переподключается.
+EVENTS_STREAM_TIMEOUT = 60 * 5
+
+EVENTS_RETENTION = 60 * 60
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -26,6 +161,13 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Адрес сайта для ссылок в письмах.
+SITE_URL = 'http://127.0.0.1:8000'
+
+DIGEST_CHECKPOINT = os.path.join(BASE_DIR, 'digest_checkpoint.json')
+
+DIGEST_MAX_POSTS = 10
+
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -55,11 +197,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiler.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -86,6 +230,9 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
             ],
+            'libraries': {
+                'cache': 'core.templatetags.metered_cache',
+            },
         },
     },
 ]
@@ -96,9 +243,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
+# Набор PRAGMA из core.db.PRAGMA_PROFILES для каждого соединения SQLite.
+SQLITE_PRAGMA_PROFILE = 'tuned'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -127,3 +281,51 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+
+if ENVIRONMENT == 'production':
+    DEBUG = False
+    try:
+        SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+    except KeyError:
+        raise ImproperlyConfigured(
+            'Задайте YATUBE_SECRET_KEY для production'
+        ) from None
+    if os.environ.get('YATUBE_ALLOWED_HOSTS'):
+        ALLOWED_HOSTS = os.environ['YATUBE_ALLOWED_HOSTS'].split(',')
+    INSTALLED_APPS.remove('debug_toolbar')
+    MIDDLEWARE.remove('debug_toolbar.middleware.DebugToolbarMiddleware')
+    # Шаблоны компилируются один раз на процесс.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [(
+        'django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ],
+    )]
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove(
+        'django.template.context_processors.debug'
+    )
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    IMAGE_WORKERS = 2
+    # Кэш общий для всех процессов WSGI: версии тегов страниц, отметка
+    # последнего поста и сессии должны меняться сразу во всех воркерах.
+    # Файловый кэш общий в пределах сервера, для нескольких серверов
+    # задайте адреса memcached в YATUBE_MEMCACHED (через запятую).
+    if os.environ.get('YATUBE_MEMCACHED'):
+        CACHES['default'] = {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': os.environ['YATUBE_MEMCACHED'].split(','),
+        }
+    else:
+        CACHES['default'] = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get(
+                'YATUBE_CACHE_DIR',
+                os.path.join(tempfile.gettempdir(), 'yatube-cache'),
+            ),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    # Сессия читается из кэша, в базу идут только записи.
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
+    WARMUP_ON_STARTUP = os.environ.get('YATUBE_WARMUP', '1') == '1'
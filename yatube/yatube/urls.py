@@ -1,7 +1,9 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import metrics, serve_media
+from posts.views import thumbnail
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
@@ -12,12 +14,22 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
-    path('about/', include('about.urls', namespace='about'))
+    path('about/', include('about.urls', namespace='about')),
+    path('_profiler/', include('core.urls', namespace='core')),
+    path('metrics', metrics, name='metrics'),
+    re_path(
+        r'^{}thumb/(?P<width>\d+)x(?P<height>\d+)/(?P<crop>crop|fit)/'
+        r'(?P<path>.+)$'.format(settings.MEDIA_URL.lstrip('/')),
+        thumbnail,
+        name='thumbnail'
+    ),
+    re_path(
+        r'^{}(?P<path>.+)$'.format(settings.MEDIA_URL.lstrip('/')),
+        serve_media,
+        name='media'
+    ),
 ]
 
 if settings.DEBUG:
     import debug_toolbar
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)